@@ -2,15 +2,24 @@
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import contextlib
+import functools
 import logging
+import threading
 from typing import Any
 
-from langchain.agents import create_agent
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import AIMessage
 from prometheus_client import Histogram, Counter
 
+from .analysis_cache import AnalysisCache, cache_key
+from .config import get_settings
+from .fast_path import match_fast_path
 from .models import Analysis
+from .openai_http import get_async_http_client, get_http_client
 from .tools import (
+    k8s_batch,
     k8s_check_rbac,
     k8s_describe,
     k8s_events,
@@ -34,17 +43,20 @@ from .tools import (
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on graph steps (each LLM turn and each tool round counts as one)
+AGENT_RECURSION_LIMIT = 30
+
 # Prometheus metrics
 AGENT_ITERATIONS = Histogram(
     'project_fyr_agent_iterations',
     'Number of LLM iterations per investigation',
-    buckets=[1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000]
+    buckets=[1, 2, 3, 5, 8, 13, 21, 34]
 )
 
 AGENT_INVESTIGATIONS = Counter(
     'project_fyr_agent_investigations_total',
     'Total number of investigations performed',
-    ['status']  # success, error, mock, disabled
+    ['status']  # success, error, truncated, fast_path, cached, mock, disabled
 )
 
 AGENT_SYSTEM_PROMPT = """You are an expert Kubernetes SRE. Your task is to diagnose why a deployment is failing.
@@ -72,6 +84,9 @@ Follow this investigation process:
    - High memory usage approaching limits
    - Network errors that might cause connectivity issues
 
+When multiple inspections are independent (e.g., events + describe + logs for known-crashing pods),
+issue them together via `k8s_batch` instead of one tool call per turn.
+
 Your final answer must be a structured analysis containing:
 - A summary of the issue.
 - The likely root cause.
@@ -81,6 +96,112 @@ Your final answer must be a structured analysis containing:
 Do not give up easily. Dig deep into logs and events.
 """
 
+@functools.lru_cache(maxsize=8)
+def _build_llm(model_name: str, api_key: str | None, api_base: str | None,
+               api_version: str | None, azure_deployment: str | None):
+    """Build (once per configuration) the chat model and its HTTP connection pool."""
+    # Imported lazily: langchain_openai pulls in openai/httpx, which mock and
+    # disabled runs never need.
+    from langchain_openai import AzureChatOpenAI, ChatOpenAI
+
+    # Configure for Azure OpenAI if api_base is provided
+    if api_base:
+        # For Azure OpenAI, use AzureChatOpenAI instead
+        return AzureChatOpenAI(
+            model=azure_deployment or model_name,
+            azure_deployment=azure_deployment or model_name,
+            temperature=1,
+            api_key=api_key,
+            azure_endpoint=api_base,
+            api_version=api_version,
+            http_client=get_http_client(),
+            http_async_client=get_async_http_client(),
+        )
+    return ChatOpenAI(
+        model=model_name,
+        temperature=0,
+        api_key=api_key,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _build_agent(model_name: str, api_key: str | None, api_base: str | None,
+                 api_version: str | None, azure_deployment: str | None, debug: bool = False):
+    """Compile the investigation graph once per configuration and reuse it."""
+    from langchain.agents import create_agent
+
+    llm = _build_llm(model_name, api_key, api_base, api_version, azure_deployment)
+
+    tools = [
+        k8s_get_resources,
+        k8s_describe,
+        k8s_logs,
+        k8s_events,
+        k8s_get_argocd_application,
+        k8s_list_helm_releases,
+        k8s_get_configmap,
+        k8s_get_secret_structure,
+        k8s_get_storage,
+        k8s_get_network,
+        k8s_get_nodes,
+        k8s_check_rbac,
+        k8s_get_network_policies,
+        k8s_get_endpoints,
+        k8s_query_prometheus,
+        k8s_batch,
+    ]
+
+    # Use the new create_agent API with recursion limit
+    return create_agent(
+        model=llm,
+        tools=tools,
+        system_prompt=AGENT_SYSTEM_PROMPT,
+        debug=debug
+    ).with_config({"recursion_limit": AGENT_RECURSION_LIMIT})
+
+
+@functools.lru_cache(maxsize=1)
+def _analysis_cache() -> AnalysisCache:
+    return AnalysisCache(get_settings().analysis_cache_path)
+
+
+def _alert_cache_key(deployment: str, namespace: str, alert_context: dict[str, Any] | None) -> str | None:
+    """Key alert-triggered investigations on the target and the set of firing alerts."""
+    if not alert_context or get_settings().analysis_cache_ttl_seconds <= 0:
+        return None
+    alerts = sorted(
+        (a.get("name") or "", a.get("description") or "") for a in alert_context.get("alerts", [])
+    )
+    return cache_key({"deployment": deployment, "namespace": namespace, "alerts": alerts})
+
+
+@functools.lru_cache(maxsize=1)
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """Long-lived loop for async investigations started from synchronous code.
+
+    Pooled async HTTP connections are bound to the loop that opened them, so
+    reusing one loop (instead of ``asyncio.run`` per call) keeps them valid.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="investigator-loop", daemon=True).start()
+    atexit.register(_close_async_http_client, loop)
+    return loop
+
+
+def _close_async_http_client(loop: asyncio.AbstractEventLoop) -> None:
+    # Close the shared client on the loop its connections were opened on
+    if not get_async_http_client.cache_info().currsize:
+        return
+    with contextlib.suppress(Exception):
+        asyncio.run_coroutine_threadsafe(get_async_http_client().aclose(), loop).result(timeout=5)
+
+
+def _run_sync(coro):
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop()).result()
+
+
 class InvestigatorAgent:
     def __init__(self, model_name: str = "gpt-4-turbo-preview", api_key: str | None = None, 
                  api_base: str | None = None, api_version: str | None = None,
@@ -89,50 +210,91 @@ class InvestigatorAgent:
         self._enabled = api_key is not None or model_name == "mock"
         
         if self._enabled and model_name != "mock":
-            # Configure for Azure OpenAI if api_base is provided
-            if api_base:
-                # For Azure OpenAI, use AzureChatOpenAI instead
-                from langchain_openai import AzureChatOpenAI
-                llm = AzureChatOpenAI(
-                    model=azure_deployment or model_name,
-                    azure_deployment=azure_deployment or model_name,
-                    temperature=1,
-                    api_key=api_key,
-                    azure_endpoint=api_base,
-                    api_version=api_version,
-                )
-            else:
-                llm = ChatOpenAI(model=model_name, temperature=0, api_key=api_key)
-            
-            tools = [
-                k8s_get_resources,
-                k8s_describe,
-                k8s_logs,
-                k8s_events,
-                k8s_get_argocd_application,
-                k8s_list_helm_releases,
-                k8s_get_configmap,
-                k8s_get_secret_structure,
-                k8s_get_storage,
-                k8s_get_network,
-                k8s_get_nodes,
-                k8s_check_rbac,
-                k8s_get_network_policies,
-                k8s_get_endpoints,
-                k8s_query_prometheus,
-            ]
-            
-            # Use the new create_agent API with recursion limit
-            self._agent = create_agent(
-                model=llm,
-                tools=tools,
-                system_prompt=AGENT_SYSTEM_PROMPT,
-                debug=True
-            ).with_config({"recursion_limit": 1000})
+            self._agent = _build_agent(
+                model_name, api_key, api_base, api_version, azure_deployment, get_settings().agent_debug
+            )
         else:
             self._agent = None
 
     def investigate(self, deployment: str, namespace: str, alert_context: dict[str, Any] | None = None) -> Analysis:
+        analysis, key = self._precheck(deployment, namespace, alert_context)
+        if analysis is not None:
+            return analysis
+
+        try:
+            # Invoke the agent with the new format
+            result = self._agent.invoke(self._build_input(deployment, namespace, alert_context))
+            analysis = self._to_analysis(deployment, result)
+        except Exception as e:
+            return self._error_analysis(deployment, e)
+
+        self._remember(key, analysis)
+        return analysis
+
+    async def investigate_async(
+        self, deployment: str, namespace: str, alert_context: dict[str, Any] | None = None
+    ) -> Analysis:
+        """Async variant of :meth:`investigate` that streams the agent run.
+
+        Tool I/O and LLM generation are awaited rather than blocking a thread,
+        so many investigations can share one event loop.
+        """
+        analysis, key = self._precheck(deployment, namespace, alert_context)
+        if analysis is not None:
+            return analysis
+
+        try:
+            result = None
+            async for event in self._agent.astream_events(
+                self._build_input(deployment, namespace, alert_context), version="v2"
+            ):
+                kind = event["event"]
+                if kind == "on_tool_end":
+                    logger.debug(f"[{deployment}] tool {event['name']} finished")
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    # The root run's end event carries the final graph state
+                    result = event["data"].get("output")
+            if result is None:
+                raise RuntimeError("Agent stream ended without a final result")
+            analysis = self._to_analysis(deployment, result)
+        except Exception as e:
+            return self._error_analysis(deployment, e)
+
+        self._remember(key, analysis)
+        return analysis
+
+    def investigate_many(
+        self,
+        targets: list[tuple[str, str]],
+        max_concurrency: int = 4,
+    ) -> list[Analysis]:
+        """Investigate several (deployment, namespace) pairs concurrently.
+
+        Investigations are independent, so they run together on the agent's
+        event loop and wall time approaches the slowest investigation rather
+        than the sum of all of them. Results are returned in input order.
+        """
+        if not targets:
+            return []
+        return _run_sync(self.investigate_many_async(targets, max_concurrency))
+
+    async def investigate_many_async(
+        self,
+        targets: list[tuple[str, str]],
+        max_concurrency: int = 4,
+    ) -> list[Analysis]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(deployment: str, namespace: str) -> Analysis:
+            async with semaphore:
+                return await self.investigate_async(deployment, namespace)
+
+        return list(await asyncio.gather(*(run(d, n) for d, n in targets)))
+
+    def _precheck(
+        self, deployment: str, namespace: str, alert_context: dict[str, Any] | None
+    ) -> tuple[Analysis | None, str | None]:
+        """Answer without the agent when possible; otherwise return the cache key to fill."""
         if self._model_name == "mock":
             AGENT_INVESTIGATIONS.labels(status='mock').inc()
             return Analysis(
@@ -140,7 +302,13 @@ class InvestigatorAgent:
                 likely_cause="Mock agent active.",
                 recommended_steps=["Enable OpenAI API key for real investigation."],
                 severity="low",
-            )
+            ), None
+
+        # Alerts that already name the root cause don't need an LLM investigation
+        fast_path = match_fast_path(alert_context)
+        if fast_path is not None:
+            AGENT_INVESTIGATIONS.labels(status='fast_path').inc()
+            return fast_path, None
 
         if not self._enabled or self._agent is None:
             AGENT_INVESTIGATIONS.labels(status='disabled').inc()
@@ -149,54 +317,81 @@ class InvestigatorAgent:
                 likely_cause="Missing API key",
                 recommended_steps=["Provide OPENAI_API_KEY"],
                 severity="low",
-            )
+            ), None
 
-        try:
-            # Use the new agent API - it expects messages format
-            user_message = f"Investigate the deployment '{deployment}' in namespace '{namespace}'."
-            
-            if alert_context:
-                user_message += f"\n\nCONTEXT: The investigation was triggered by the following alerts:\n{alert_context.get('summary', '')}\n"
-                alerts = alert_context.get("alerts", [])
-                if alerts:
-                    user_message += "Active Alerts:\n"
-                    for a in alerts:
-                        user_message += f"- {a.get('name')} ({a.get('severity')}): {a.get('description')}\n"
-                user_message += "\nPlease prioritize investigating the root cause of these alerts."
-            
-            # Invoke the agent with the new format
-            result = self._agent.invoke(
-                {"messages": [{"role": "user", "content": user_message}]}
-            )
-            
-            # Extract the final message content and count iterations
-            messages = result.get("messages", [])
-            
-            # Count iterations: number of AI messages (excluding the initial user message)
-            iteration_count = sum(1 for msg in messages if hasattr(msg, 'type') and msg.type == 'ai')
-            AGENT_ITERATIONS.observe(iteration_count)
-            logger.info(f"Investigation completed in {iteration_count} iterations")
-            if messages:
-                # Get the last AI message
-                last_message = messages[-1]
-                output_text = messages[-1].content if hasattr(last_message, 'content') else str(last_message)
-            else:
-                output_text = "No response from agent"
-            
-            AGENT_INVESTIGATIONS.labels(status='success').inc()
+        # Recurring alerts for the same deployment reuse a recent investigation
+        key = _alert_cache_key(deployment, namespace, alert_context)
+        if key is not None:
+            cached = _analysis_cache().get(key)
+            if cached is not None:
+                AGENT_INVESTIGATIONS.labels(status='cached').inc()
+                return Analysis.model_validate_json(cached), None
+        return None, key
+
+    @staticmethod
+    def _remember(key: str | None, analysis: Analysis) -> None:
+        if key is not None:
+            _analysis_cache().set(key, analysis.model_dump_json(), get_settings().analysis_cache_ttl_seconds)
+
+    @staticmethod
+    def _build_input(deployment: str, namespace: str, alert_context: dict[str, Any] | None = None) -> dict[str, Any]:
+        # Use the new agent API - it expects messages format
+        user_message = f"Investigate the deployment '{deployment}' in namespace '{namespace}'."
+
+        if alert_context:
+            user_message += f"\n\nCONTEXT: The investigation was triggered by the following alerts:\n{alert_context.get('summary', '')}\n"
+            alerts = alert_context.get("alerts", [])
+            if alerts:
+                user_message += "Active Alerts:\n"
+                for a in alerts:
+                    user_message += f"- {a.get('name')} ({a.get('severity')}): {a.get('description')}\n"
+            user_message += "\nPlease prioritize investigating the root cause of these alerts."
+
+        return {"messages": [{"role": "user", "content": user_message}]}
+
+    @staticmethod
+    def _to_analysis(deployment: str, result: dict[str, Any]) -> Analysis:
+        # Extract the final message content and count iterations
+        messages = result.get("messages", [])
+
+        # Count iterations: number of AI messages (excluding the initial user message)
+        iteration_count = sum(1 for msg in messages if isinstance(msg, AIMessage))
+        AGENT_ITERATIONS.observe(iteration_count)
+        logger.info(f"Investigation completed in {iteration_count} iterations")
+        if messages:
+            # Get the last AI message
+            last_message = messages[-1]
+            output_text = last_message.content if isinstance(last_message, AIMessage) else str(last_message)
+        else:
+            output_text = "No response from agent"
+
+        AGENT_INVESTIGATIONS.labels(status='success').inc()
+        return Analysis(
+            summary=f"Agent Investigation for {deployment}",
+            likely_cause=output_text,
+            recommended_steps=["See detailed analysis above."],
+            severity="medium"
+        )
+
+    @staticmethod
+    def _error_analysis(deployment: str, e: Exception) -> Analysis:
+        from langgraph.errors import GraphRecursionError
+
+        if isinstance(e, GraphRecursionError):
+            logger.warning(f"Agent investigation of {deployment} hit the {AGENT_RECURSION_LIMIT} step limit")
+            AGENT_INVESTIGATIONS.labels(status='truncated').inc()
             return Analysis(
-                summary=f"Agent Investigation for {deployment}",
-                likely_cause=output_text,
-                recommended_steps=["See detailed analysis above."],
+                summary=f"Agent investigation for {deployment} was truncated",
+                likely_cause=f"Investigation did not conclude within {AGENT_RECURSION_LIMIT} steps.",
+                recommended_steps=["Investigate manually starting from the deployment's pods and events."],
                 severity="medium"
             )
-            
-        except Exception as e:
-            logger.error(f"Agent investigation failed: {e}", exc_info=True)
-            AGENT_INVESTIGATIONS.labels(status='error').inc()
-            return Analysis(
-                summary=f"Agent failed to investigate {deployment}",
-                likely_cause=f"Internal error: {str(e)}",
-                recommended_steps=["Check logs"],
-                severity="high"
-            )
+
+        logger.error(f"Agent investigation failed: {e}", exc_info=e)
+        AGENT_INVESTIGATIONS.labels(status='error').inc()
+        return Analysis(
+            summary=f"Agent failed to investigate {deployment}",
+            likely_cause=f"Internal error: {str(e)}",
+            recommended_steps=["Check logs"],
+            severity="high"
+        )
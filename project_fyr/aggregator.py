@@ -2,19 +2,31 @@
 
 from __future__ import annotations
 
+import functools
 import logging
-from typing import Any
+import re
+from datetime import datetime
+from typing import Any, Callable, Iterable, TypeVar
 
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from .db import Rollout, AnalysisRecord
+from .openai_http import get_async_http_client, get_http_client
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Input token budget for the failure listing sent to the LLM
+DEFAULT_MAX_INPUT_TOKENS = 6000
+# At most this many distinct failure patterns are sent to the LLM
+MAX_BUCKETS = 50
+
 
 class AggregatedIssue(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
+
     cause: str
     count: int
     description: str
@@ -22,10 +34,142 @@ class AggregatedIssue(BaseModel):
 
 
 class AggregationResult(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
+
     top_issues: list[AggregatedIssue]
     summary: str
 
 
+def _structured_output_kwargs(api_base: str | None) -> dict[str, Any]:
+    """Pick the structured-output channel for the configured endpoint.
+
+    OpenAI supports native strict JSON schema responses. Custom endpoints
+    (Azure, OpenAI-compatible gateways) do not reliably, so fall back to
+    function calling there.
+    """
+    if api_base:
+        return {"method": "function_calling"}
+    return {"method": "json_schema", "strict": True}
+
+
+@functools.lru_cache(maxsize=8)
+def _token_counter(model_name: str) -> Callable[[str], int]:
+    """Return a token counting function for ``model_name``.
+
+    Falls back to a ~4 characters per token estimate when tiktoken or its
+    encoding files are unavailable (e.g. air-gapped clusters).
+    """
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text))
+    except Exception as e:
+        logger.debug(f"tiktoken unavailable for {model_name}, estimating tokens: {e}")
+        return lambda text: len(text) // 4 + 1
+
+
+def _fit_to_budget(
+    items: Iterable[T],
+    formatter: Callable[[int, T], str],
+    max_tokens: int,
+    count_tokens: Callable[[str], int],
+    max_items: int | None = None,
+    noun: str = "similar failures",
+) -> str:
+    """Greedily format ``items`` in order until ``max_tokens`` is exhausted.
+
+    Items that do not fit (or exceed ``max_items``) are summarized in a
+    trailing line.
+    """
+    items = list(items)
+    parts = []
+    used = 0
+    for i, item in enumerate(items, 1):
+        if max_items is not None and len(parts) >= max_items:
+            break
+        text = formatter(i, item)
+        cost = count_tokens(text)
+        if parts and used + cost > max_tokens:
+            break
+        parts.append(text)
+        used += cost
+    dropped = len(items) - len(parts)
+    if dropped:
+        parts.append(f"... and {dropped} more {noun}\n")
+    return "".join(parts)
+
+
+def _failure_recency(failure: tuple[Rollout, AnalysisRecord | None]) -> datetime:
+    rollout = failure[0]
+    return rollout.failed_at or rollout.started_at or datetime.min
+
+
+def _bucket_failures(failures: Iterable[tuple[Rollout, AnalysisRecord | None]]) -> list[dict[str, Any]]:
+    """Group failures sharing the same normalized likely cause.
+
+    Single pass over ``failures`` in any order; each bucket keeps a running
+    max on recency so its example is the latest failure it saw (the first
+    one on ties). Buckets are returned by count, desc.
+    """
+    buckets: dict[str, dict[str, Any]] = {}
+    for failure in failures:
+        rollout, analysis = failure
+        details = analysis.analysis if analysis else None
+        cause = details.get("likely_cause", "N/A") if details is not None else None
+        key = re.sub(r"\s+", " ", cause.lower()).strip()[:200] if cause is not None else ""
+        seen = _failure_recency(failure)
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = {"count": 0, "namespaces": set(), "latest": None}
+        if bucket["latest"] is None or seen > bucket["latest"]:
+            bucket["latest"] = seen
+            bucket["example"] = rollout
+            bucket["summary"] = details.get("summary", "N/A") if details is not None else None
+            bucket["likely_cause"] = cause
+        bucket["count"] += 1
+        bucket["namespaces"].add(rollout.namespace)
+    return sorted(buckets.values(), key=lambda b: b["count"], reverse=True)
+
+
+def _format_bucket(i: int, bucket: dict[str, Any]) -> str:
+    example = bucket["example"]
+    if bucket["likely_cause"] is not None:
+        analysis_block = (
+            f"Summary: {bucket['summary']}\n"
+            f"Likely Cause: {bucket['likely_cause']}\n"
+        )
+    else:
+        analysis_block = "Analysis: Pending or failed\n"
+    return (
+        f"Pattern #{i} (count={bucket['count']}):\n"
+        f"Namespaces: {', '.join(sorted(bucket['namespaces']))}\n"
+        f"Example Deployment: {example.namespace}/{example.deployment}\n"
+        f"{analysis_block}---\n"
+    )
+
+
+# Compiled once and shared by every aggregator instance
+_AGG_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert SRE / DevOps engineer analyzing a list of recent deployment failures.
+    
+    Your goal is to:
+    1. Group similar failures together based on their root cause.
+    2. Count how many times each type of failure occurred.
+    3. Provide a concise technical description of the pattern.
+    4. List the unique namespaces affected by each pattern.
+    5. Provide a high-level summary of the overall system health based on these failures.
+
+    Ignore transient or one-off errors if they are not significant, unless there are very few errors in total.
+    Focus on recurring patterns like "OOMKills", "Missing ConfigMaps", "Image Pull Errors", etc.
+    """),
+    ("user", "Here are the recent failures, grouped by identical likely cause with occurrence counts:\n\n{failures_text}")
+])
+
+
 class IssueAggregator:
     def __init__(
         self, 
@@ -34,7 +178,13 @@ class IssueAggregator:
         api_base: str | None = None,
         api_version: str | None = None,
         azure_deployment: str | None = None,
+        max_input_tokens: int = DEFAULT_MAX_INPUT_TOKENS,
     ):
+        self.model_name = model_name
+        self.max_input_tokens = max_input_tokens
+
+        from langchain_openai import ChatOpenAI
+
         self.llm = ChatOpenAI(
             model=model_name,
             api_key=api_key,
@@ -42,23 +192,12 @@ class IssueAggregator:
             api_version=api_version,
             azure_deployment=azure_deployment,
             temperature=0,
-        ).with_structured_output(AggregationResult)
-
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert SRE / DevOps engineer analyzing a list of recent deployment failures.
-            
-            Your goal is to:
-            1. Group similar failures together based on their root cause.
-            2. Count how many times each type of failure occurred.
-            3. Provide a concise technical description of the pattern.
-            4. List the unique namespaces affected by each pattern.
-            5. Provide a high-level summary of the overall system health based on these failures.
-
-            Ignore transient or one-off errors if they are not significant, unless there are very few errors in total.
-            Focus on recurring patterns like "OOMKills", "Missing ConfigMaps", "Image Pull Errors", etc.
-            """),
-            ("user", "Here are the recent failures:\n\n{failures_text}")
-        ])
+            http_client=get_http_client(),
+            http_async_client=get_async_http_client(),
+        ).with_structured_output(AggregationResult, **_structured_output_kwargs(api_base))
+
+        self.prompt = _AGG_PROMPT
+        self._chain = self.prompt | self.llm
 
     def aggregate_issues(self, failures: list[tuple[Rollout, AnalysisRecord]]) -> dict[str, Any]:
         """Aggregate a list of failures into patterns."""
@@ -68,22 +207,20 @@ class IssueAggregator:
                 "summary": "No recent failures detected."
             }
 
-        # Format input for the LLM
-        failures_text = ""
-        for i, (rollout, analysis) in enumerate(failures, 1):
-            failures_text += f"Failure #{i}:\n"
-            failures_text += f"Namespace: {rollout.namespace}\n"
-            failures_text += f"Deployment: {rollout.deployment}\n"
-            if analysis:
-                failures_text += f"Summary: {analysis.analysis.get('summary', 'N/A')}\n"
-                failures_text += f"Likely Cause: {analysis.analysis.get('likely_cause', 'N/A')}\n"
-            else:
-                failures_text += "Analysis: Pending or failed\n"
-            failures_text += "---\n"
+        # Collapse identical causes in Python so the LLM clusters patterns, not rows.
+        # Each pattern's example is its latest occurrence.
+        buckets = _bucket_failures(failures)
+        failures_text = _fit_to_budget(
+            buckets,
+            _format_bucket,
+            self.max_input_tokens,
+            _token_counter(self.model_name),
+            max_items=MAX_BUCKETS,
+            noun="failure patterns",
+        )
 
         try:
-            chain = self.prompt | self.llm
-            result = chain.invoke({"failures_text": failures_text})
+            result = self._chain.invoke({"failures_text": failures_text})
             return result.model_dump()
         except Exception as e:
             logger.error(f"Failed to aggregate issues: {e}")
@@ -0,0 +1,67 @@
+"""SQLite-backed TTL cache of investigation results."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from prometheus_client import Counter
+
+ANALYSIS_CACHE_HITS = Counter(
+    'project_fyr_analysis_cache_hits_total',
+    'Investigations answered from the analysis cache'
+)
+
+ANALYSIS_CACHE_MISSES = Counter(
+    'project_fyr_analysis_cache_misses_total',
+    'Analysis cache lookups that required a fresh investigation'
+)
+
+
+def cache_key(payload: dict[str, Any]) -> str:
+    """Stable 128-bit key over a JSON-serializable payload."""
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+class AnalysisCache:
+    """Maps cache keys to serialized analyses until their TTL expires.
+
+    Backed by SQLite so the cache can optionally persist across restarts
+    (pass a file path); defaults to a per-process in-memory database.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM analysis_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            ANALYSIS_CACHE_MISSES.inc()
+            return None
+        ANALYSIS_CACHE_HITS.inc()
+        return row[0]
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + ttl),
+            )
+            # Opportunistically drop expired entries so the table stays small
+            self._conn.execute("DELETE FROM analysis_cache WHERE expires_at <= ?", (now,))
@@ -8,5 +8,5 @@ from .service import AnalyzerService
 logger = logging.getLogger(__name__)
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.DEBUG)
+    logging.basicConfig(level=logging.INFO)
     AnalyzerService().start()
@@ -1,11 +1,14 @@
 """Settings for the Project Fyr service."""
 
-from typing import Optional
+import functools
+from typing import Any, Optional
 from pydantic import Field
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="PROJECT_FYR_", case_sensitive=False, extra="ignore")
+
     database_url: str = Field(
         default="sqlite:///./project_fyr.db",
         description="SQLAlchemy database URL",
@@ -18,8 +21,28 @@ class Settings(BaseSettings):
     openai_api_version: Optional[str] = Field(default=None)
     azure_deployment: Optional[str] = Field(default=None)
     langchain_model_name: str = Field(default="gpt-4o-mini")
+    agent_debug: bool = Field(
+        default=False,
+        description="Enable LangGraph debug tracing of every agent step (verbose; not for production)"
+    )
+    agent_max_concurrency: int = Field(
+        default=4,
+        description="Maximum number of failed rollouts investigated in parallel by the analyzer"
+    )
+    analysis_cache_path: str = Field(
+        default=":memory:",
+        description="SQLite file for the alert investigation cache (':memory:' keeps it per-process)"
+    )
+    analysis_cache_ttl_seconds: int = Field(
+        default=3600,
+        description="Reuse an alert-triggered investigation for identical alerts within this window (0 disables)"
+    )
     k8s_cluster_name: str = Field(default="ci-cluster")
     rollout_timeout_seconds: int = Field(default=15 * 60)
+    k8s_pool_size: int = Field(
+        default=32,
+        description="urllib3 connection pool size of the shared Kubernetes API client"
+    )
     
     # Watch behavior
     watch_all_namespaces: bool = Field(
@@ -80,9 +103,16 @@ class Settings(BaseSettings):
     
     prometheus_url: Optional[str] = Field(default=None, description="Prometheus server URL")
 
-    class Config:
-        env_prefix = "PROJECT_FYR_"
-        case_sensitive = False
+
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsing the environment on first use."""
+    return Settings()
 
 
-settings = Settings()
+def __getattr__(name: str) -> Any:
+    # Keep ``from .config import settings`` working without parsing the
+    # environment at import time.
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,31 +1,39 @@
 from fastapi import FastAPI, Request, Depends, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 from sqlalchemy.orm import Session
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Iterator
 
-from .db import init_db, RolloutRepo, Rollout, AnalysisRecord, AlertRepo
-from .config import settings
+from .db import get_engine, RolloutRepo, Rollout, AnalysisRecord, AlertRepo
+from .config import get_settings
 from .webhook import router as webhook_router
 
-app = FastAPI(title="Project Fyr Dashboard")
+app = FastAPI(title="Project Fyr Dashboard", default_response_class=ORJSONResponse)
 app.include_router(webhook_router)
 
 BASE_DIR = Path(__file__).resolve().parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+# Persist compiled template bytecode so restarted workers skip recompilation
+templates.env.bytecode_cache = FileSystemBytecodeCache()
 
 # Dependency
 def get_repo() -> Iterator[RolloutRepo]:
-    engine = init_db(settings.database_url)
+    engine = get_engine(get_settings().database_url)
     yield RolloutRepo(engine)
 
 def get_alert_repo() -> Iterator[AlertRepo]:
-    engine = init_db(settings.database_url)
+    engine = get_engine(get_settings().database_url)
     yield AlertRepo(engine)
 
 @app.get("/", response_class=HTMLResponse)
-async def index(request: Request, status: str = None, namespace: str = None, repo: RolloutRepo = Depends(get_repo)):
+def index(request: Request, status: str = None, namespace: str = None, repo: RolloutRepo = Depends(get_repo)):
     # Filter by status and/or namespace if provided
     if status and namespace:
         rollouts = repo.list_by_status_and_namespace(status, namespace, limit=50)
@@ -44,23 +52,12 @@ async def index(request: Request, status: str = None, namespace: str = None, rep
     })
 
 @app.get("/rollout/{rollout_id}", response_class=HTMLResponse)
-async def detail(request: Request, rollout_id: int, repo: RolloutRepo = Depends(get_repo)):
-    rollout = repo.get_by_id(rollout_id)
+def detail(request: Request, rollout_id: int, repo: RolloutRepo = Depends(get_repo)):
+    rollout, record = repo.get_with_analysis(rollout_id)
     if not rollout:
         raise HTTPException(status_code=404, detail="Rollout not found")
     
-    # We also want the analysis if it exists.
-    # Since we don't have a direct relationship loaded eagerly or a separate method for analysis,
-    # we might need to fetch it. But Rollout has analysis_id.
-    # Let's add get_analysis method to repo as well? Or just rely on lazy loading if session was open?
-    # Session is closed after get_by_id returns.
-    # So we need a way to fetch analysis.
-    
-    analysis_data = None
-    if rollout.analysis_id:
-        record = repo.get_analysis(rollout.analysis_id)
-        if record:
-            analysis_data = record.analysis
+    analysis_data = record.analysis if record else None
 
     return templates.TemplateResponse("detail.html", {"request": request, "rollout": rollout, "analysis": analysis_data})
 
@@ -75,6 +72,7 @@ async def investigate(request: Request):
         
     from .agent import InvestigatorAgent
     
+    settings = get_settings()
     agent = InvestigatorAgent(
         model_name=settings.langchain_model_name,
         api_key=settings.openai_api_key,
@@ -84,87 +82,101 @@ async def investigate(request: Request):
     )
     
     try:
-        analysis = agent.investigate(deployment, namespace)
+        # The agent run is blocking; keep it off the event loop
+        analysis = await run_in_threadpool(agent.investigate, deployment, namespace)
         return analysis.model_dump()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/investigate", response_class=HTMLResponse)
-async def investigate_page(request: Request):
-    from kubernetes import client, config
-    try:
-        config.load_incluster_config()
-    except:
-        config.load_kube_config()
-        
-    v1 = client.AppsV1Api()
-    core = client.CoreV1Api()
+@functools.lru_cache(maxsize=1)
+def _k8s_clients():
+    """Apps and Core API wrappers over the shared client, built on first use."""
+    from kubernetes import client
+    from .k8s_client import get_api_client
+
+    api_client = get_api_client()
+    return client.AppsV1Api(api_client), client.CoreV1Api(api_client)
+
+# The investigate page lists the whole cluster; back-to-back renders share one snapshot
+INVESTIGATE_CONTEXT_TTL_SECONDS = 5
+_investigate_context_cache: dict[str, tuple[float, dict]] = {}
+_investigate_context_lock = threading.Lock()
+
+
+def _build_investigate_context() -> dict:
+    v1, core = _k8s_clients()
     
-    namespaces = [ns.metadata.name for ns in core.list_namespace().items]
+    # The two lists are independent; fetch them in parallel (one RTT instead of two)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        ns_future = pool.submit(core.list_namespace)
+        deps_future = pool.submit(v1.list_deployment_for_all_namespaces)
+        namespaces = [ns.metadata.name for ns in ns_future.result().items]
+        all_deployments = deps_future.result().items
     deployments = {}
     deployment_statuses = {}
     
-    for ns in namespaces:
-        deps = v1.list_namespaced_deployment(ns).items
-        if deps:
-            deployments[ns] = []
-            for d in deps:
-                dep_name = d.metadata.name
-                deployments[ns].append(dep_name)
-                
-                # Check if deployment is healthy
-                ready_replicas = d.status.ready_replicas or 0
-                desired_replicas = d.spec.replicas or 0
-                is_failing = ready_replicas < desired_replicas
-                
-                deployment_statuses[f"{ns}/{dep_name}"] = {
-                    "failing": is_failing,
-                    "ready": ready_replicas,
-                    "desired": desired_replicas
-                }
-            
-    return templates.TemplateResponse("investigate.html", {
-        "request": request, 
-        "namespaces": namespaces, 
+    # One cluster-wide list instead of one request per namespace
+    for d in all_deployments:
+        ns = d.metadata.namespace
+        dep_name = d.metadata.name
+        deployments.setdefault(ns, []).append(dep_name)
+        
+        # Check if deployment is healthy
+        ready_replicas = d.status.ready_replicas or 0
+        desired_replicas = d.spec.replicas or 0
+        is_failing = ready_replicas < desired_replicas
+        
+        deployment_statuses[f"{ns}/{dep_name}"] = {
+            "failing": is_failing,
+            "ready": ready_replicas,
+            "desired": desired_replicas
+        }
+
+    return {
+        "namespaces": namespaces,
         "deployments": deployments,
-        "deployment_statuses": deployment_statuses
+        "deployment_statuses": deployment_statuses,
+    }
+
+
+def _get_investigate_context() -> dict:
+    now = time.time()
+    with _investigate_context_lock:
+        entry = _investigate_context_cache.get("context")
+        if entry and now - entry[0] < INVESTIGATE_CONTEXT_TTL_SECONDS:
+            return entry[1]
+    context = _build_investigate_context()
+    with _investigate_context_lock:
+        _investigate_context_cache["context"] = (now, context)
+    return context
+
+@app.get("/investigate", response_class=HTMLResponse)
+def investigate_page(request: Request):
+    return templates.TemplateResponse("investigate.html", {
+        "request": request,
+        **_get_investigate_context(),
     })
 
 @app.get("/alerts", response_class=HTMLResponse)
-async def alerts_index(request: Request, repo: AlertRepo = Depends(get_alert_repo)):
-    # We need to fetch batches. AlertRepo doesn't have list_batches yet.
-    # Let's add it ad-hoc or assume we added it.
-    # Wait, I didn't add list_batches to AlertRepo in previous step.
-    # I should add it now or use direct session.
-    # Let's use direct session for now to avoid another file edit if possible, 
-    # but cleaner to add to Repo.
-    # Actually, I can just add the method to AlertRepo in db.py first?
-    # Or just do a query here.
-    
-    from sqlalchemy import select, desc
-    from .db import AlertBatchRecord
-    
-    stmt = select(AlertBatchRecord).order_by(AlertBatchRecord.created_at.desc()).limit(50)
-    with repo.session() as s:
-        batches = s.scalars(stmt).all()
-        
+def alerts_index(request: Request, repo: AlertRepo = Depends(get_alert_repo)):
+    batches = repo.list_batches(limit=50)
     return templates.TemplateResponse("alerts.html", {"request": request, "batches": batches})
 
 @app.get("/alerts/{batch_id}", response_class=HTMLResponse)
-async def alert_detail(request: Request, batch_id: int, repo: AlertRepo = Depends(get_alert_repo)):
-    batch = repo.get_batch(batch_id)
-    if not batch:
-        raise HTTPException(status_code=404, detail="Batch not found")
-        
-    alerts = repo.get_batch_alerts(batch_id)
-    
-    # Get job status
-    # We need to find the job for this batch
+def alert_detail(request: Request, batch_id: int, repo: AlertRepo = Depends(get_alert_repo)):
     from .db import InvestigationJob
     from sqlalchemy import select
     
-    stmt = select(InvestigationJob).where(InvestigationJob.alert_batch_id == batch_id)
+    # Batch, alerts and job status share one session
     with repo.session() as s:
+        batch = repo.get_batch(batch_id, session=s)
+        if not batch:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        
+        alerts = repo.get_batch_alerts(batch_id, session=s)
+        
+        # Get job status
+        stmt = select(InvestigationJob).where(InvestigationJob.alert_batch_id == batch_id)
         job = s.scalars(stmt).first()
         
     return templates.TemplateResponse("alert_detail.html", {
@@ -176,7 +188,7 @@ async def alert_detail(request: Request, batch_id: int, repo: AlertRepo = Depend
 
 
 @app.get("/overview", response_class=HTMLResponse)
-async def overview(request: Request, hours: int = 24, repo: RolloutRepo = Depends(get_repo)):
+def overview(request: Request, hours: int = 24, repo: RolloutRepo = Depends(get_repo)):
     stats = repo.get_stats(hours=hours)
     
     return templates.TemplateResponse("overview.html", {
@@ -187,7 +199,7 @@ async def overview(request: Request, hours: int = 24, repo: RolloutRepo = Depend
 
 
 @app.get("/api/overview/insights")
-async def get_overview_insights(hours: int = 24, repo: RolloutRepo = Depends(get_repo)):
+def get_overview_insights(hours: int = 24, repo: RolloutRepo = Depends(get_repo)):
     """Get AI-aggregated insights for recent failures."""
     from .aggregator import IssueAggregator
     
@@ -200,6 +212,7 @@ async def get_overview_insights(hours: int = 24, repo: RolloutRepo = Depends(get
             "summary": "No failures detected in the selected time window (or no analysis available)."
         }
 
+    settings = get_settings()
     aggregator = IssueAggregator(
         model_name=settings.langchain_model_name,
         api_key=settings.openai_api_key,
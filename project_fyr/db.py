@@ -2,44 +2,240 @@
 
 from __future__ import annotations
 
-from contextlib import contextmanager
-from datetime import datetime, timedelta
+import functools
+import logging
+from contextlib import AbstractContextManager, nullcontext
+from datetime import datetime, timedelta, timezone
+from enum import Enum
 from typing import Iterator, Optional, Any
 
-from sqlalchemy import JSON, DateTime, Enum as SAEnum, Integer, String, create_engine, select, update, func
-from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+import orjson
+from sqlalchemy import (
+    JSON, Boolean, CheckConstraint, DateTime, Index, Integer, Row, Select, String,
+    TypeDecorator, UniqueConstraint, create_engine, event, false, insert, inspect, lambda_stmt, literal, select, text, update, func,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, joinedload, load_only, mapped_column, raiseload, relationship, selectinload, sessionmaker, undefer, validates
+from sqlalchemy.pool import StaticPool
 
 from .models import Analysis, AnalysisStatus, NotifyStatus, ReducedContext, RolloutStatus, NamespaceIncidentType, NamespaceIncidentStatus
 
+logger = logging.getLogger(__name__)
+
 
 class Base(DeclarativeBase):
-    pass
+    # Fetch server-generated columns during the INSERT flush (RETURNING where
+    # supported) so objects stay complete after commit without a refresh
+    __mapper_args__ = {"eager_defaults": True}
+
+
+def _json_serializer(value: Any) -> str:
+    # orjson encodes at C speed; allow non-str keys like the stdlib encoder does
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+class FastJSON(TypeDecorator):
+    """JSON column encoded and decoded with orjson whatever the engine's settings.
+
+    Stored as JSONB on PostgreSQL (binary, GIN-indexable) and JSON elsewhere.
+    orjson encodes datetimes and enums natively, and ``orjson.Fragment``
+    values (already-encoded JSON) are embedded as-is. ``None`` is stored as
+    SQL NULL.
+    """
+
+    impl = JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(JSON())
+
+    def bind_processor(self, dialect):
+        def process(value):
+            return None if value is None else _json_serializer(value)
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            # Some drivers (psycopg2 for json/jsonb) already return decoded values
+            if value is None or not isinstance(value, (str, bytes)):
+                return value
+            return orjson.loads(value)
+        return process
+
+
+JSONType = FastJSON()
+
+
+class EnumName(TypeDecorator):
+    """String column holding enum member names, loaded back as members.
+
+    Matches what ``SAEnum`` stored before these columns became plain checked
+    strings, so existing rows keep matching. Binds accept members, names or
+    values; anything else is passed through for the CHECK constraint to reject.
+    """
+
+    impl = String(32)
+    cache_ok = True
+
+    def __init__(self, enum: type[Enum]):
+        super().__init__()
+        self._enum = enum
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, self._enum):
+            return value.name
+        if value in self._enum.__members__:
+            return value
+        try:
+            return self._enum(value).name
+        except ValueError:
+            return value
+
+    def process_result_value(self, value, dialect):
+        member = self._enum.__members__.get(value) if value is not None else None
+        return member if member is not None else value
+
+
+class utcnow(FunctionElement):
+    """Current UTC time computed by the database, as a naive timestamp.
+
+    Columns keep naive UTC values so they compare directly with the
+    ``datetime.utcnow()`` cutoffs used throughout the repositories. They also
+    keep their Python-side ``datetime.utcnow`` default: ``create_all`` never
+    adds the server default to existing NOT NULL columns.
+    """
+
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+@compiles(utcnow, "mysql")
+def _utcnow_mysql(element, compiler, **kw):
+    return "(UTC_TIMESTAMP(6))"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    # CURRENT_TIMESTAMP has whole-second precision on SQLite
+    return "(STRFTIME('%Y-%m-%d %H:%M:%f', 'now'))"
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """``value`` as the naive UTC timestamp the DateTime columns hold."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _enum_check(column: str, enum: type[Enum], name: str) -> CheckConstraint:
+    """CHECK constraint restricting a plain string ``column`` to ``enum``'s member names.
+
+    Names are what ``SAEnum`` stored; for the rollout statuses they equal the values.
+    """
+    values = ", ".join(f"'{member.name}'" for member in enum)
+    return CheckConstraint(f"{column} IN ({values})", name=name)
+
+
+def _enum_value(value: Enum | str) -> str:
+    return value.value if isinstance(value, Enum) else value
+
+
+# Predicates of RolloutRepo.list_active / list_failed, used by partial indexes
+_ACTIVE_ROLLOUT = text("status IN ('PENDING', 'ROLLING_OUT')")
+_FAILED_UNANALYZED_ROLLOUT = text("status = 'FAILED' AND analysis_status <> 'DONE'")
 
 
 class Rollout(Base):
     __tablename__ = "rollouts"
+    __table_args__ = (
+        # Statuses are plain strings (no native enum type to ALTER, no per-row
+        # Enum coercion on load); the database still rejects unknown values
+        _enum_check("status", RolloutStatus, "ck_rollout_status"),
+        _enum_check("analysis_status", AnalysisStatus, "ck_rollout_analysis_status"),
+        _enum_check("notify_status", NotifyStatus, "ck_rollout_notify_status"),
+        # Dashboard lists filter by status or namespace and page by id desc;
+        # a B-tree serves the descending order by scanning backwards
+        Index("ix_rollout_status_id", "status", "id"),
+        Index("ix_rollout_namespace_id", "namespace", "id"),
+        # Rate limiting counts a cluster's rollouts over a started_at window
+        Index("ix_rollout_cluster_started", "cluster", "started_at"),
+        # get_stats aggregates status counts over a started_at window
+        Index("ix_rollout_started_status", "started_at", "status"),
+        # Natural key: get_by_key is a single unique-index probe
+        UniqueConstraint("cluster", "namespace", "deployment", "generation", name="uq_rollout_key"),
+        # list_active / list_failed filter by cluster and status together
+        Index("ix_rollout_cluster_status", "cluster", "status"),
+        # Partial indexes covering only the rows the reconcile/analyzer loops poll
+        # (MySQL has no partial indexes; ix_rollout_cluster_status serves it there)
+        Index(
+            "ix_rollout_active",
+            "cluster",
+            postgresql_where=_ACTIVE_ROLLOUT,
+            sqlite_where=_ACTIVE_ROLLOUT,
+        ).ddl_if(dialect=("postgresql", "sqlite")),
+        Index(
+            "ix_rollout_failed_unanalyzed",
+            "cluster",
+            postgresql_where=_FAILED_UNANALYZED_ROLLOUT,
+            sqlite_where=_FAILED_UNANALYZED_ROLLOUT,
+        ).ddl_if(dialect=("postgresql", "sqlite")),
+        # Containment lookups on metadata (metadata @> '{...}')
+        Index(
+            "ix_rollout_metadata_gin",
+            "metadata",
+            postgresql_using="gin",
+            postgresql_ops={"metadata": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    cluster: Mapped[str] = mapped_column(String(255), index=True)
-    namespace: Mapped[str] = mapped_column(String(255), index=True)
-    deployment: Mapped[str] = mapped_column(String(255), index=True)
-    generation: Mapped[int] = mapped_column(Integer, index=True)
-    status: Mapped[str] = mapped_column(SAEnum(RolloutStatus), default=RolloutStatus.PENDING)
+    cluster: Mapped[str] = mapped_column(String(255))
+    namespace: Mapped[str] = mapped_column(String(255))
+    deployment: Mapped[str] = mapped_column(String(255))
+    generation: Mapped[int] = mapped_column(Integer)
+    status: Mapped[str] = mapped_column(String(32), default=RolloutStatus.PENDING.value)
     started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     failed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     origin: Mapped[str] = mapped_column(String(50), default="k8s")
-    metadata_json: Mapped[Optional[dict]] = mapped_column("metadata", JSON, default=dict)
+    metadata_json: Mapped[Optional[dict]] = mapped_column("metadata", JSONType, default=dict)
     analysis_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    analysis_status: Mapped[AnalysisStatus] = mapped_column(
-        SAEnum(AnalysisStatus), default=AnalysisStatus.PENDING
-    )
-    notify_status: Mapped[NotifyStatus] = mapped_column(
-        SAEnum(NotifyStatus), default=NotifyStatus.PENDING
-    )
+    analysis_status: Mapped[str] = mapped_column(String(32), default=AnalysisStatus.PENDING.value)
+    notify_status: Mapped[str] = mapped_column(String(32), default=NotifyStatus.PENDING.value)
     team: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     slack_channel: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
 
+    # Latest analysis. There is no DB-level foreign key (analyses.rollout_id is
+    # also reused for namespace incidents), so the join is declared here.
+    # lazy="raise": callers must load it explicitly instead of issuing N+1 selects.
+    analysis: Mapped[Optional["AnalysisRecord"]] = relationship(
+        "AnalysisRecord",
+        primaryjoin="foreign(Rollout.analysis_id) == AnalysisRecord.id",
+        viewonly=True,
+        lazy="raise",
+    )
+
+    @validates("status", "analysis_status", "notify_status")
+    def _validate_status(self, key: str, value: Enum | str) -> str:
+        return _enum_value(value)
+
 
 class AnalysisRecord(Base):
     __tablename__ = "analyses"
@@ -48,9 +244,10 @@ class AnalysisRecord(Base):
     rollout_id: Mapped[int] = mapped_column(Integer, index=True)
     model_name: Mapped[str] = mapped_column(String(255))
     prompt_version: Mapped[str] = mapped_column(String(50))
-    reduced_context: Mapped[dict] = mapped_column(JSON)
-    analysis: Mapped[dict] = mapped_column(JSON)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Multi-KB blobs, loaded only by queries that undefer them
+    reduced_context: Mapped[dict] = mapped_column(JSONType, deferred=True)
+    analysis: Mapped[dict] = mapped_column(JSONType, deferred=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, server_default=utcnow())
 
 
 class AlertBatchRecord(Base):
@@ -63,29 +260,55 @@ class AlertBatchRecord(Base):
     window_start: Mapped[datetime] = mapped_column(DateTime)
     window_end: Mapped[datetime] = mapped_column(DateTime)
     context_summary: Mapped[str] = mapped_column(String(2000))  # JSON or text summary
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, server_default=utcnow(), index=True)
 
 
 class AlertRecord(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        # get_unbatched_alerts only ever reads the (small) unbatched tail
+        Index(
+            "ix_alerts_unbatched",
+            "received_at",
+            postgresql_where=text("batched = false"),
+            sqlite_where=text("batched = 0"),
+        ).ddl_if(dialect=("postgresql", "sqlite")),
+        # Containment lookups on labels (labels @> '{"severity": "critical"}')
+        Index(
+            "ix_alert_labels_gin",
+            "labels",
+            postgresql_using="gin",
+            postgresql_ops={"labels": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     fingerprint: Mapped[str] = mapped_column(String(255), index=True)
     status: Mapped[str] = mapped_column(String(50))
     starts_at: Mapped[datetime] = mapped_column(DateTime)
     ends_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
-    labels: Mapped[dict] = mapped_column(JSON)
-    annotations: Mapped[dict] = mapped_column(JSON)
-    payload: Mapped[dict] = mapped_column(JSON)
-    received_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    labels: Mapped[dict] = mapped_column(JSONType)
+    annotations: Mapped[dict] = mapped_column(JSONType)
+    payload: Mapped[dict] = mapped_column(JSONType)
+    received_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, server_default=utcnow())
     
     # Batching
-    batched: Mapped[bool] = mapped_column(Integer, default=0)  # SQLite bool
+    batched: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=false())
     batch_id: Mapped[Optional[int]] = mapped_column(Integer, index=True, nullable=True)
 
 
 class InvestigationJob(Base):
     __tablename__ = "investigation_jobs"
+    __table_args__ = (
+        # FIFO dequeue scans only the pending rows, oldest first
+        Index(
+            "ix_jobs_pending",
+            "created_at",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ).ddl_if(dialect=("postgresql", "sqlite")),
+        Index("ix_jobs_status_created_at", "status", "created_at").ddl_if(dialect=("mysql", "mariadb")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     type: Mapped[str] = mapped_column(String(50))  # rollout | alert | namespace
@@ -98,7 +321,7 @@ class InvestigationJob(Base):
     
     analysis_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, server_default=utcnow())
     started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
@@ -111,86 +334,287 @@ class AlertStateRecord(Base):
     status: Mapped[str] = mapped_column(String(50))
     last_received_at: Mapped[datetime] = mapped_column(DateTime)
     last_investigated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, server_default=utcnow())
 
 
 class NamespaceIncidentRecord(Base):
     __tablename__ = "namespace_incidents"
+    __table_args__ = (
+        # Checked strings holding member names, as SAEnum stored them
+        _enum_check("incident_type", NamespaceIncidentType, "ck_ns_incident_type"),
+        _enum_check("status", NamespaceIncidentStatus, "ck_ns_incident_status"),
+        _enum_check("analysis_status", AnalysisStatus, "ck_ns_incident_analysis_status"),
+        _enum_check("notify_status", NotifyStatus, "ck_ns_incident_notify_status"),
+        # list_active filters by cluster and status; the dashboard pages by id desc
+        Index("ix_ns_incident_cluster_status", "cluster", "status"),
+        Index("ix_ns_incident_status_id", "status", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    cluster: Mapped[str] = mapped_column(String(255), index=True)
+    cluster: Mapped[str] = mapped_column(String(255))
     namespace: Mapped[str] = mapped_column(String(255), index=True)
-    incident_type: Mapped[str] = mapped_column(SAEnum(NamespaceIncidentType))
-    status: Mapped[str] = mapped_column(SAEnum(NamespaceIncidentStatus), default=NamespaceIncidentStatus.ACTIVE)
-    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    incident_type: Mapped[NamespaceIncidentType] = mapped_column(EnumName(NamespaceIncidentType))
+    status: Mapped[NamespaceIncidentStatus] = mapped_column(
+        EnumName(NamespaceIncidentStatus), default=NamespaceIncidentStatus.ACTIVE
+    )
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, server_default=utcnow(), index=True)
     resolved_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
-    metadata_json: Mapped[Optional[dict]] = mapped_column("metadata", JSON, default=dict)
+    metadata_json: Mapped[Optional[dict]] = mapped_column("metadata", JSONType, default=dict)
     analysis_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     analysis_status: Mapped[AnalysisStatus] = mapped_column(
-        SAEnum(AnalysisStatus), default=AnalysisStatus.PENDING
+        EnumName(AnalysisStatus), default=AnalysisStatus.PENDING
     )
     notify_status: Mapped[NotifyStatus] = mapped_column(
-        SAEnum(NotifyStatus), default=NotifyStatus.PENDING
+        EnumName(NotifyStatus), default=NotifyStatus.PENDING
     )
     team: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     slack_channel: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, server_default=utcnow())
+
+
+def _merge_metadata(dialect: str, patch: dict) -> Any:
+    """SQL expression merging ``patch`` into the stored rollout metadata.
+
+    Top-level keys of ``patch`` win. The merge runs inside the UPDATE so
+    concurrent patches don't overwrite each other. Returns None for dialects
+    without a JSON merge function.
+    """
+    if dialect == "postgresql":
+        current = func.coalesce(Rollout.metadata_json, literal({}, JSONB))
+        return current.op("||", return_type=JSONB)(literal(patch, JSONB))
+    if dialect == "sqlite":
+        return func.json_patch(func.coalesce(Rollout.metadata_json, "{}"), literal(patch, JSON))
+    if dialect in ("mysql", "mariadb"):
+        return func.json_merge_patch(func.coalesce(Rollout.metadata_json, func.json_object()), literal(patch, JSON))
+    return None
+
+
+def _list_query(stmt: Select) -> Select:
+    """Forbid lazy relationship loads on list results.
+
+    Rendering a list must not issue one query per row; relationships a caller
+    needs are loaded explicitly (e.g. with ``selectinload``) instead.
+    """
+    return stmt.options(raiseload("*"))
+
+
+def _engine_options(database_url: str) -> dict[str, Any]:
+    """Pool settings for ``database_url``.
+
+    Server databases get a sized, pre-pinged pool so workers reuse warm
+    connections. SQLite connections are shared across threads; an in-memory
+    database must stay on a single connection to remain the same database.
+    """
+    if not database_url.startswith("sqlite"):
+        options: dict[str, Any] = {"pool_size": 10, "max_overflow": 20, "pool_pre_ping": True, "pool_recycle": 1800}
+        if make_url(database_url).get_driver_name() == "psycopg2":
+            # INSERTs already go out as multi-row VALUES; also batch executemany
+            # UPDATEs (e.g. marking an alert batch) with psycopg2's execute_batch
+            options.update(
+                executemany_mode="values_plus_batch",
+                executemany_batch_page_size=100,
+                insertmanyvalues_page_size=1000,
+            )
+        return options
+    options: dict[str, Any] = {"connect_args": {"check_same_thread": False}}
+    if database_url in ("sqlite://", "sqlite:///:memory:"):
+        options["poolclass"] = StaticPool
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed while a writer holds the database
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
 
 
 def init_db(database_url: str):
-    engine = create_engine(database_url, future=True)
+    engine = create_engine(
+        database_url,
+        future=True,
+        json_serializer=_json_serializer,
+        json_deserializer=orjson.loads,
+        # Room for every repo statement per dialect without LRU churn
+        query_cache_size=2000,
+        **_engine_options(database_url),
+    )
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
     Base.metadata.create_all(engine)
     return engine
 
 
+@functools.lru_cache(maxsize=None)
+def get_engine(database_url: str):
+    """Return a process-wide engine for ``database_url``, initializing it once.
+
+    Request handlers must share one engine (and its connection pool) rather
+    than building a new one per request.
+    """
+    return init_db(database_url)
+
+
+@functools.lru_cache(maxsize=None)
+def get_sessionmaker(engine) -> sessionmaker[Session]:
+    """Return the session factory shared by every repository bound to ``engine``."""
+    return sessionmaker(engine, expire_on_commit=False)
+
+
+@functools.lru_cache(maxsize=None)
+def _has_rollout_key(engine) -> bool:
+    """Whether the ``rollouts`` table carries a unique key on its natural key.
+
+    Schema comes from ``create_all``, which never alters an existing table, so
+    databases created before ``uq_rollout_key`` was added lack it until it is
+    created out of band. Checked once per engine.
+    """
+    inspector = inspect(engine)
+    wanted = {"cluster", "namespace", "deployment", "generation"}
+    candidates = [c["column_names"] for c in inspector.get_unique_constraints("rollouts")]
+    candidates += [i["column_names"] for i in inspector.get_indexes("rollouts") if i.get("unique")]
+    if any(set(columns) == wanted for columns in candidates):
+        return True
+    logger.warning(
+        "rollouts has no unique key on (cluster, namespace, deployment, generation); "
+        "upserts fall back to select + write. Remove duplicate rows and create uq_rollout_key to enable them."
+    )
+    return False
+
+
 class RolloutRepo:
     def __init__(self, engine):
         self._engine = engine
+        self._sessions = get_sessionmaker(engine)
+
+    def session(self, session: Optional[Session] = None) -> AbstractContextManager[Session]:
+        """Open a session, or reuse ``session`` so callers can share one across calls.
 
-    @contextmanager
-    def session(self) -> Iterator[Session]:
-        with Session(self._engine) as session:
-            yield session
+        A new Session is its own context manager (closed on exit); a shared
+        one is wrapped so leaving the block does not close it.
+        """
+        if session is not None:
+            return nullcontext(session)
+        return self._sessions()
 
     def create(self, **kwargs) -> Rollout:
         rollout = Rollout(**kwargs)
         with self.session() as s:
             s.add(rollout)
             s.commit()
-            s.refresh(rollout)
         return rollout
 
-    def get_by_key(self, cluster: str, namespace: str, deployment: str, generation: int) -> Optional[Rollout]:
-        stmt = select(Rollout).where(
+    def get_by_key(
+        self, cluster: str, namespace: str, deployment: str, generation: int, *, session: Optional[Session] = None
+    ) -> Optional[Rollout]:
+        # Hot path (every watch event): a lambda statement skips rebuilding and
+        # re-hashing the SELECT; the closure variables become bound parameters
+        stmt = lambda_stmt(lambda: select(Rollout))
+        stmt += lambda st: st.where(
             Rollout.cluster == cluster,
             Rollout.namespace == namespace,
             Rollout.deployment == deployment,
             Rollout.generation == generation,
         )
-        with self.session() as s:
+        with self.session(session) as s:
             return s.scalars(stmt).first()
 
-    def list_active(self, cluster: str) -> list[Rollout]:
+    def upsert(
+        self,
+        *,
+        cluster: str,
+        namespace: str,
+        deployment: str,
+        generation: int,
+        metadata_json: Optional[dict] = None,
+        team: Optional[str] = None,
+        slack_channel: Optional[str] = None,
+        **insert_values: Any,
+    ) -> None:
+        """Insert a rollout for its natural key, or refresh its metadata if it exists.
+
+        Runs as a single INSERT ... ON CONFLICT statement where the dialect
+        supports it and the table has ``uq_rollout_key``. ``insert_values`` only apply to new rows; metadata
+        arguments that are None leave an existing row untouched, and
+        ``metadata_json`` is merged as in :meth:`update_metadata`.
+        """
+        key = {"cluster": cluster, "namespace": namespace, "deployment": deployment, "generation": generation}
+        dialect = self._engine.dialect.name
+        updates = {
+            column: value
+            for column, value in (
+                (Rollout.team, team),
+                (Rollout.slack_channel, slack_channel),
+            )
+            if value is not None
+        }
+        if metadata_json is not None:
+            updates[Rollout.metadata_json] = _merge_metadata(dialect, metadata_json)
+        values = {
+            **key,
+            **insert_values,
+            "metadata_json": metadata_json or {},
+            "team": team,
+            "slack_channel": slack_channel,
+        }
+
+        # ON CONFLICT / ON DUPLICATE KEY need uq_rollout_key, which older tables lack
+        keyed = _has_rollout_key(self._engine)
+
+        if keyed and dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            stmt = dialect_insert(Rollout).values(**values)
+            if updates:
+                stmt = stmt.on_conflict_do_update(index_elements=list(key), set_=updates)
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=list(key))
+        elif keyed and dialect in ("mysql", "mariadb"):
+            from sqlalchemy.dialects.mysql import insert as dialect_insert
+
+            stmt = dialect_insert(Rollout).values(**values)
+            stmt = stmt.on_duplicate_key_update(updates or {Rollout.id: Rollout.id})
+        else:
+            existing = self.get_by_key(cluster, namespace, deployment, generation)
+            if existing is None:
+                self.create(**values)
+            else:
+                self.update_metadata(existing.id, metadata_json=metadata_json, team=team, slack_channel=slack_channel)
+            return
+
+        with self.session() as s:
+            s.execute(stmt)
+            s.commit()
+
+    def list_active(self, cluster: str, *, session: Optional[Session] = None) -> list[Rollout]:
+        return list(self.iter_active(cluster, session=session))
+
+    def iter_active(self, cluster: str, *, session: Optional[Session] = None) -> Iterator[Rollout]:
+        """Stream a cluster's pending and rolling-out rollouts in chunks of 500."""
         stmt = select(Rollout).where(
             Rollout.cluster == cluster,
             Rollout.status.in_([RolloutStatus.PENDING, RolloutStatus.ROLLING_OUT]),
         )
-        with self.session() as s:
-            return list(s.scalars(stmt))
+        with self.session(session) as s:
+            yield from s.scalars(_list_query(stmt).execution_options(yield_per=500))
 
-    def list_failed(self, cluster: str) -> list[Rollout]:
+    def list_failed(self, cluster: str, *, session: Optional[Session] = None) -> list[Rollout]:
         stmt = select(Rollout).where(
             Rollout.cluster == cluster,
             Rollout.status == RolloutStatus.FAILED,
             Rollout.analysis_status != AnalysisStatus.DONE,
         )
-        with self.session() as s:
-            return list(s.scalars(stmt))
+        with self.session(session) as s:
+            return list(s.scalars(_list_query(stmt)))
 
     def list_recent(self, limit: int = 50) -> list[Rollout]:
         stmt = select(Rollout).order_by(Rollout.id.desc()).limit(limit)
         with self.session() as s:
-            return list(s.scalars(stmt))
+            return list(s.scalars(_list_query(stmt)))
 
     def list_by_status(self, status: str, limit: int = 50) -> list[Rollout]:
         """List rollouts filtered by status."""
@@ -205,7 +629,7 @@ class RolloutRepo:
             Rollout.status == status_enum
         ).order_by(Rollout.id.desc()).limit(limit)
         with self.session() as s:
-            return list(s.scalars(stmt))
+            return list(s.scalars(_list_query(stmt)))
 
     def list_by_namespace(self, namespace: str, limit: int = 50) -> list[Rollout]:
         """List rollouts filtered by namespace."""
@@ -213,32 +637,26 @@ class RolloutRepo:
             Rollout.namespace == namespace
         ).order_by(Rollout.id.desc()).limit(limit)
         with self.session() as s:
-            return list(s.scalars(stmt))
+            return list(s.scalars(_list_query(stmt)))
 
     def get_stats(self, hours: int = 24) -> dict[str, int]:
         """Get rollout statistics for the last N hours."""
         cutoff = datetime.utcnow() - timedelta(hours=hours)
-        
-        # Total rollouts in window
-        stmt_total = select(Rollout).where(Rollout.started_at >= cutoff)
-        
-        # Success count
-        stmt_success = select(Rollout).where(
-            Rollout.started_at >= cutoff,
-            Rollout.status == RolloutStatus.SUCCESS
-        )
-        
-        # Failed count
-        stmt_failed = select(Rollout).where(
-            Rollout.started_at >= cutoff,
-            Rollout.status == RolloutStatus.FAILED
+
+        # One grouped aggregate instead of loading every rollout in the window
+        stmt = (
+            select(Rollout.status, func.count(Rollout.id))
+            .where(Rollout.started_at >= cutoff)
+            .group_by(Rollout.status)
         )
 
         with self.session() as s:
-            total = len(list(s.scalars(stmt_total)))
-            success = len(list(s.scalars(stmt_success)))
-            failed = len(list(s.scalars(stmt_failed)))
-            
+            counts = dict(s.execute(stmt).all())
+
+        total = sum(counts.values())
+        success = counts.get(RolloutStatus.SUCCESS.value, 0)
+        failed = counts.get(RolloutStatus.FAILED.value, 0)
+
         return {
             "total": total,
             "success": success,
@@ -250,10 +668,11 @@ class RolloutRepo:
         """Get failed rollouts with their analysis records for the last N hours."""
         cutoff = datetime.utcnow() - timedelta(hours=hours)
         
-        # Join Rollout with AnalysisRecord
+        # Analyses are batch-loaded by one extra IN (...) query rather than
+        # widening every rollout row with a join
         stmt = (
-            select(Rollout, AnalysisRecord)
-            .outerjoin(AnalysisRecord, Rollout.analysis_id == AnalysisRecord.id)
+            select(Rollout)
+            .options(selectinload(Rollout.analysis).undefer(AnalysisRecord.analysis))
             .where(
                 Rollout.status == RolloutStatus.FAILED,
                 Rollout.started_at >= cutoff,
@@ -264,10 +683,7 @@ class RolloutRepo:
         )
         
         with self.session() as s:
-            # Result is a list of Row objects (tuples)
-            results = s.execute(stmt).all()
-            # Convert to list of tuples for easier consumption
-            return [(r.Rollout, r.AnalysisRecord) for r in results]
+            return [(r, r.analysis) for r in s.scalars(_list_query(stmt))]
 
     def list_by_status_and_namespace(self, status: str, namespace: str, limit: int = 50) -> list[Rollout]:
         """List rollouts filtered by both status and namespace."""
@@ -281,17 +697,31 @@ class RolloutRepo:
             Rollout.namespace == namespace
         ).order_by(Rollout.id.desc()).limit(limit)
         with self.session() as s:
-            return list(s.scalars(stmt))
+            return list(s.scalars(_list_query(stmt)))
 
-    def get_by_id(self, rollout_id: int) -> Optional[Rollout]:
-        stmt = select(Rollout).where(Rollout.id == rollout_id)
-        with self.session() as s:
-            return s.scalars(stmt).first()
+    def get_by_id(self, rollout_id: int, *, session: Optional[Session] = None) -> Optional[Rollout]:
+        # Primary-key lookup: served from the identity map when already loaded
+        with self.session(session) as s:
+            return s.get(Rollout, rollout_id)
 
-    def get_analysis(self, analysis_id: int) -> Optional[AnalysisRecord]:
-        stmt = select(AnalysisRecord).where(AnalysisRecord.id == analysis_id)
-        with self.session() as s:
-            return s.scalars(stmt).first()
+    def get_with_analysis(
+        self, rollout_id: int, *, session: Optional[Session] = None
+    ) -> tuple[Optional[Rollout], Optional[AnalysisRecord]]:
+        """Get a rollout and its analysis record (if any) in a single query."""
+        stmt = (
+            select(Rollout)
+            .options(joinedload(Rollout.analysis).undefer(AnalysisRecord.analysis))
+            .where(Rollout.id == rollout_id)
+        )
+        with self.session(session) as s:
+            rollout = s.scalars(stmt).first()
+            if rollout is None:
+                return None, None
+            return rollout, rollout.analysis
+
+    def get_analysis(self, analysis_id: int, *, session: Optional[Session] = None) -> Optional[AnalysisRecord]:
+        with self.session(session) as s:
+            return s.get(AnalysisRecord, analysis_id, options=[undefer(AnalysisRecord.analysis)])
 
     def update_status(self, rollout_id: int, new_status: RolloutStatus, **timestamps) -> None:
         stmt = (
@@ -318,27 +748,34 @@ class RolloutRepo:
         model_name: str,
         prompt_version: str = "v1",
     ) -> None:
+        # Encode before opening the transaction with pydantic's compiled
+        # serializer; FastJSON embeds the fragments without re-encoding them
+        reduced_context_json = orjson.Fragment(reduced_context.model_dump_json())
+        analysis_json = orjson.Fragment(analysis.model_dump_json())
         with self.session() as s:
-            record = AnalysisRecord(
-                rollout_id=rollout_id,
-                model_name=model_name,
-                prompt_version=prompt_version,
-                reduced_context=reduced_context.model_dump(mode="json"),
-                analysis=analysis.model_dump(mode="json"),
-            )
-            s.add(record)
-            s.flush()
+            # Core INSERT: no unit-of-work flush or server-default fetch for a
+            # record nobody reads back; both statements share one commit
+            analysis_id = s.execute(
+                insert(AnalysisRecord).values(
+                    rollout_id=rollout_id,
+                    model_name=model_name,
+                    prompt_version=prompt_version,
+                    reduced_context=reduced_context_json,
+                    analysis=analysis_json,
+                )
+            ).inserted_primary_key[0]
             status_stmt = (
                 update(Rollout)
                 .where(Rollout.id == rollout_id)
                 .values(
-                    analysis_id=record.id,
+                    analysis_id=analysis_id,
                     analysis_status=AnalysisStatus.DONE,
-                    completed_at=analysis.created_at,
+                    completed_at=_naive_utc(analysis.created_at),
                 )
             )
             s.execute(status_stmt)
             s.commit()
+
     def update_metadata(
         self,
         rollout_id: int,
@@ -347,97 +784,201 @@ class RolloutRepo:
         team: Optional[str] = None,
         slack_channel: Optional[str] = None,
     ) -> None:
+        """Update routing fields; ``metadata_json`` is merged into the stored metadata."""
         values: dict[str, Any] = {}
-        if metadata_json is not None:
-            values["metadata_json"] = metadata_json
         if team is not None:
             values["team"] = team
         if slack_channel is not None:
             values["slack_channel"] = slack_channel
-        if not values:
-            return
-        stmt = update(Rollout).where(Rollout.id == rollout_id).values(**values)
         with self.session() as s:
-            s.execute(stmt)
+            if metadata_json is not None:
+                merged = _merge_metadata(self._engine.dialect.name, metadata_json)
+                if merged is None:
+                    current = s.scalar(select(Rollout.metadata_json).where(Rollout.id == rollout_id))
+                    merged = {**(current or {}), **metadata_json}
+                values["metadata_json"] = merged
+            if not values:
+                return
+            s.execute(update(Rollout).where(Rollout.id == rollout_id).values(**values))
             s.commit()
 
 
+    def skip_analysis(
+        self, *, cluster: str, namespace: str, deployment: str, generation: int, reason: str
+    ) -> bool:
+        """Close out a failed rollout's pending analysis without running one.
+
+        The rollout keeps its FAILED status; its analysis is marked DONE and
+        ``reason`` is recorded under ``analysis_skipped`` in its metadata.
+        Returns whether a rollout was waiting for analysis.
+        """
+        stmt = select(Rollout.id).where(
+            Rollout.cluster == cluster,
+            Rollout.namespace == namespace,
+            Rollout.deployment == deployment,
+            Rollout.generation == generation,
+            Rollout.status == RolloutStatus.FAILED,
+            Rollout.analysis_status != AnalysisStatus.DONE,
+        )
+        with self.session() as s:
+            rollout_id = s.scalar(stmt)
+            if rollout_id is None:
+                return False
+            s.execute(update(Rollout).where(Rollout.id == rollout_id).values(analysis_status=AnalysisStatus.DONE))
+            s.commit()
+        self.update_metadata(rollout_id, metadata_json={"analysis_skipped": reason})
+        return True
+
+
 class AlertRepo:
     def __init__(self, engine):
         self._engine = engine
+        self._sessions = get_sessionmaker(engine)
+
+    def session(self, session: Optional[Session] = None) -> AbstractContextManager[Session]:
+        """Open a session, or reuse ``session`` so callers can share one across calls.
 
-    @contextmanager
-    def session(self) -> Iterator[Session]:
-        with Session(self._engine) as session:
-            yield session
+        A new Session is its own context manager (closed on exit); a shared
+        one is wrapped so leaving the block does not close it.
+        """
+        if session is not None:
+            return nullcontext(session)
+        return self._sessions()
 
     def create_alert(self, **kwargs) -> AlertRecord:
         alert = AlertRecord(**kwargs)
         with self.session() as s:
             s.add(alert)
             s.commit()
-            s.refresh(alert)
         return alert
 
-    def get_unbatched_alerts(self, window_start: datetime) -> list[AlertRecord]:
-        # Get alerts received after window_start that are not yet batched
-        stmt = select(AlertRecord).where(
-            AlertRecord.batched == 0,
-            AlertRecord.received_at >= window_start
-        ).order_by(AlertRecord.received_at.asc())
+    def create_alerts_bulk(self, records: list[dict[str, Any]]) -> None:
+        """Insert many alerts in one executemany (batched multi-row INSERTs)."""
+        if not records:
+            return
+        with self.session() as s:
+            s.execute(insert(AlertRecord), records)
+            s.commit()
+
+    def get_unbatched_alerts(self, window_start: datetime) -> list[Row]:
+        """Get alerts received after window_start that are not yet batched."""
+        return list(self.iter_unbatched_alerts(window_start))
+
+    def iter_unbatched_alerts(self, window_start: datetime) -> Iterator[Row]:
+        """Stream alerts received after window_start that are not yet batched.
+
+        Yields lightweight rows with only the columns the batcher groups on
+        (no ORM instances, no payload/annotations), fetched in chunks.
+        """
+        stmt = (
+            select(
+                AlertRecord.id,
+                AlertRecord.fingerprint,
+                AlertRecord.labels,
+                AlertRecord.starts_at,
+                AlertRecord.received_at,
+            )
+            .where(
+                AlertRecord.batched == false(),
+                AlertRecord.received_at >= window_start
+            )
+            .order_by(AlertRecord.received_at.asc())
+            .execution_options(yield_per=1000)
+        )
         
         with self.session() as s:
-            return list(s.scalars(stmt))
+            yield from s.execute(stmt)
 
-    def create_batch(self, alerts: list[AlertRecord], summary: str, **kwargs) -> AlertBatchRecord:
+    def create_batch(self, alerts: list[AlertRecord | Row], summary: str, **kwargs) -> int:
+        """Create a batch over ``alerts`` and queue its investigation job.
+
+        Everything is written with Core statements in one transaction; returns
+        the new batch id.
+        """
         with self.session() as s:
-            batch = AlertBatchRecord(context_summary=summary, **kwargs)
-            s.add(batch)
-            s.flush()
+            batch_id = s.execute(
+                insert(AlertBatchRecord).values(context_summary=summary, **kwargs)
+            ).inserted_primary_key[0]
             
-            # Update alerts
-            alert_ids = [a.id for a in alerts]
-            stmt = update(AlertRecord).where(AlertRecord.id.in_(alert_ids)).values(
-                batched=True,
-                batch_id=batch.id
-            )
-            s.execute(stmt)
+            # Update alerts: ORM bulk UPDATE by primary key runs as one executemany,
+            # avoiding an unbounded IN (...) parameter list for large batches
+            if alerts:
+                s.execute(
+                    update(AlertRecord),
+                    [{"id": a.id, "batched": True, "batch_id": batch_id} for a in alerts],
+                )
             
             # Create job
-            job = InvestigationJob(
-                type="alert",
-                alert_batch_id=batch.id,
-                status="pending"
-            )
-            s.add(job)
+            s.execute(insert(InvestigationJob).values(type="alert", alert_batch_id=batch_id, status="pending"))
             
             s.commit()
-            s.refresh(batch)
-            return batch
+            return batch_id
 
-    def get_pending_jobs(self) -> list[InvestigationJob]:
-        stmt = select(InvestigationJob).where(InvestigationJob.status == "pending")
-        with self.session() as s:
+    def get_pending_jobs(self, *, session: Optional[Session] = None) -> list[InvestigationJob]:
+        """Get all pending investigation jobs, first in first out."""
+        stmt = (
+            select(InvestigationJob)
+            .where(InvestigationJob.status == "pending")
+            .order_by(InvestigationJob.created_at, InvestigationJob.id)
+        )
+        with self.session(session) as s:
             return list(s.scalars(stmt))
-    
-    def get_pending_namespace_jobs(self) -> list[InvestigationJob]:
+
+    def get_all_pending_jobs(self, *, session: Optional[Session] = None) -> dict[str, list[InvestigationJob]]:
+        """Get every pending job in one query, oldest first, grouped by job type."""
+        stmt = (
+            select(InvestigationJob)
+            .where(InvestigationJob.status == "pending")
+            .order_by(InvestigationJob.created_at, InvestigationJob.id)
+        )
+        jobs: dict[str, list[InvestigationJob]] = {}
+        with self.session(session) as s:
+            for job in s.scalars(stmt):
+                jobs.setdefault(job.type, []).append(job)
+        return jobs
+
+    def get_pending_namespace_jobs(self, *, session: Optional[Session] = None) -> list[InvestigationJob]:
         """Get pending investigation jobs for namespace incidents."""
-        stmt = select(InvestigationJob).where(
-            InvestigationJob.status == "pending",
-            InvestigationJob.type == "namespace"
+        stmt = (
+            select(InvestigationJob)
+            .where(
+                InvestigationJob.status == "pending",
+                InvestigationJob.type == "namespace"
+            )
+            .order_by(InvestigationJob.created_at, InvestigationJob.id)
         )
-        with self.session() as s:
+        with self.session(session) as s:
             return list(s.scalars(stmt))
 
-    def get_batch(self, batch_id: int) -> Optional[AlertBatchRecord]:
-        stmt = select(AlertBatchRecord).where(AlertBatchRecord.id == batch_id)
+    def list_batches(self, limit: int = 50) -> list[AlertBatchRecord]:
+        """List the most recent batches with only the columns the dashboard shows."""
+        stmt = (
+            select(AlertBatchRecord)
+            .options(load_only(
+                AlertBatchRecord.id,
+                AlertBatchRecord.namespace,
+                AlertBatchRecord.service,
+                AlertBatchRecord.context_summary,
+                AlertBatchRecord.created_at,
+            ))
+            .order_by(AlertBatchRecord.created_at.desc())
+            .limit(limit)
+        )
         with self.session() as s:
-            return s.scalars(stmt).first()
+            return list(s.scalars(_list_query(stmt)))
 
-    def get_batch_alerts(self, batch_id: int) -> list[AlertRecord]:
-        stmt = select(AlertRecord).where(AlertRecord.batch_id == batch_id)
-        with self.session() as s:
-            return list(s.scalars(stmt))
+    def get_batch(self, batch_id: int, *, session: Optional[Session] = None) -> Optional[AlertBatchRecord]:
+        with self.session(session) as s:
+            return s.get(AlertBatchRecord, batch_id)
+
+    def get_batch_alerts(self, batch_id: int, *, session: Optional[Session] = None) -> list[AlertRecord]:
+        return list(self.iter_batch_alerts(batch_id, session=session))
+
+    def iter_batch_alerts(self, batch_id: int, *, session: Optional[Session] = None) -> Iterator[AlertRecord]:
+        """Stream a batch's alerts in chunks of 500."""
+        stmt = select(AlertRecord).where(AlertRecord.batch_id == batch_id).execution_options(yield_per=500)
+        with self.session(session) as s:
+            yield from s.scalars(stmt)
     
     def update_job_status(self, job_id: int, status: str, **timestamps) -> None:
         stmt = update(InvestigationJob).where(InvestigationJob.id == job_id).values(status=status, **timestamps)
@@ -445,10 +986,10 @@ class AlertRepo:
             s.execute(stmt)
             s.commit()
 
-    def get_state(self, fingerprint: str) -> Optional[AlertStateRecord]:
-        stmt = select(AlertStateRecord).where(AlertStateRecord.fingerprint == fingerprint)
-        with self.session() as s:
-            return s.scalars(stmt).first()
+    def get_state(self, fingerprint: str, *, session: Optional[Session] = None) -> Optional[AlertStateRecord]:
+        # fingerprint is the primary key: no SELECT to build or compile per call
+        with self.session(session) as s:
+            return s.get(AlertStateRecord, fingerprint)
 
     def update_state(
         self,
@@ -456,50 +997,92 @@ class AlertRepo:
         status: str,
         now: datetime,
         investigated: bool = False
-    ) -> AlertStateRecord:
+    ) -> None:
+        """Record that an alert was received, creating its state row if needed.
+
+        Runs as a single INSERT ... ON CONFLICT statement where the dialect
+        supports it, so concurrent alerts for one fingerprint cannot race.
+        """
         with self.session() as s:
-            state = s.scalars(
-                select(AlertStateRecord).where(AlertStateRecord.fingerprint == fingerprint)
-            ).first()
-
-            if not state:
-                state = AlertStateRecord(
-                    fingerprint=fingerprint,
-                    status=status,
-                    last_received_at=now,
-                    last_investigated_at=now if investigated else None
-                )
-                s.add(state)
-            else:
-                state.status = status
-                state.last_received_at = now
-                if investigated:
-                    state.last_investigated_at = now
-            
+            self._upsert_state(s, fingerprint, status, now, investigated)
             s.commit()
-            s.refresh(state)
-            return state
+
+    def record_alerts(self, records: list[dict[str, Any]], states: list[dict[str, Any]]) -> None:
+        """Insert a payload's alerts and apply their state updates in one transaction.
+
+        ``states`` holds ``update_state`` keyword arguments, applied in order
+        after the insert; nothing is committed if either step fails.
+        """
+        with self.session() as s:
+            if records:
+                s.execute(insert(AlertRecord), records)
+            for state in states:
+                self._upsert_state(s, **state)
+            s.commit()
+
+    def _upsert_state(
+        self, s: Session, fingerprint: str, status: str, now: datetime, investigated: bool = False
+    ) -> None:
+        values = {
+            "fingerprint": fingerprint,
+            "status": status,
+            "last_received_at": now,
+            "last_investigated_at": now if investigated else None,
+        }
+        updates = {"status": status, "last_received_at": now}
+        if investigated:
+            updates["last_investigated_at"] = now
+
+        dialect = self._engine.dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            stmt = dialect_insert(AlertStateRecord).values(**values).on_conflict_do_update(
+                index_elements=[AlertStateRecord.fingerprint], set_=updates
+            )
+        elif dialect in ("mysql", "mariadb"):
+            from sqlalchemy.dialects.mysql import insert as dialect_insert
+
+            stmt = dialect_insert(AlertStateRecord).values(**values).on_duplicate_key_update(updates)
+        else:
+            state = s.get(AlertStateRecord, fingerprint)
+            if state is None:
+                s.add(AlertStateRecord(**values))
+            else:
+                for key, value in updates.items():
+                    setattr(state, key, value)
+            s.flush()
+            return
+
+        s.execute(stmt)
 
 
 class NamespaceIncidentRepo:
     def __init__(self, engine):
         self._engine = engine
+        self._sessions = get_sessionmaker(engine)
+
+    def session(self, session: Optional[Session] = None) -> AbstractContextManager[Session]:
+        """Open a session, or reuse ``session`` so callers can share one across calls.
 
-    @contextmanager
-    def session(self) -> Iterator[Session]:
-        with Session(self._engine) as session:
-            yield session
+        A new Session is its own context manager (closed on exit); a shared
+        one is wrapped so leaving the block does not close it.
+        """
+        if session is not None:
+            return nullcontext(session)
+        return self._sessions()
 
     def create(self, **kwargs) -> NamespaceIncidentRecord:
         incident = NamespaceIncidentRecord(**kwargs)
         with self.session() as s:
             s.add(incident)
             s.commit()
-            s.refresh(incident)
         return incident
 
     def get_active_incident(
-        self, cluster: str, namespace: str, incident_type: str
+        self, cluster: str, namespace: str, incident_type: str, *, session: Optional[Session] = None
     ) -> Optional[NamespaceIncidentRecord]:
         """Get active incident of a specific type for a namespace."""
         from .models import NamespaceIncidentType
@@ -517,10 +1100,10 @@ class NamespaceIncidentRepo:
                 NamespaceIncidentStatus.INVESTIGATING
             ]),
         )
-        with self.session() as s:
+        with self.session(session) as s:
             return s.scalars(stmt).first()
 
-    def list_active(self, cluster: str) -> list[NamespaceIncidentRecord]:
+    def list_active(self, cluster: str, *, session: Optional[Session] = None) -> list[NamespaceIncidentRecord]:
         """List all active incidents in a cluster."""
         stmt = select(NamespaceIncidentRecord).where(
             NamespaceIncidentRecord.cluster == cluster,
@@ -529,18 +1112,17 @@ class NamespaceIncidentRepo:
                 NamespaceIncidentStatus.INVESTIGATING
             ]),
         )
-        with self.session() as s:
-            return list(s.scalars(stmt))
+        with self.session(session) as s:
+            return list(s.scalars(_list_query(stmt)))
 
     def list_recent(self, limit: int = 50) -> list[NamespaceIncidentRecord]:
         stmt = select(NamespaceIncidentRecord).order_by(NamespaceIncidentRecord.id.desc()).limit(limit)
         with self.session() as s:
-            return list(s.scalars(stmt))
+            return list(s.scalars(_list_query(stmt)))
 
-    def get_by_id(self, incident_id: int) -> Optional[NamespaceIncidentRecord]:
-        stmt = select(NamespaceIncidentRecord).where(NamespaceIncidentRecord.id == incident_id)
-        with self.session() as s:
-            return s.scalars(stmt).first()
+    def get_by_id(self, incident_id: int, *, session: Optional[Session] = None) -> Optional[NamespaceIncidentRecord]:
+        with self.session(session) as s:
+            return s.get(NamespaceIncidentRecord, incident_id)
 
     def resolve(self, incident_id: int) -> None:
         """Mark incident as resolved."""
@@ -583,24 +1165,26 @@ class NamespaceIncidentRepo:
         model_name: str,
         prompt_version: str = "v1",
     ) -> None:
+        # Encode before opening the transaction (embedded as-is by FastJSON)
+        analysis_json = orjson.Fragment(analysis.model_dump_json())
         with self.session() as s:
             # We could create a separate NamespaceAnalysisRecord table,
             # but for now reuse AnalysisRecord with rollout_id = None
             # and store incident_id in metadata
-            record = AnalysisRecord(
-                rollout_id=incident_id,  # Reuse this field temporarily
-                model_name=model_name,
-                prompt_version=prompt_version,
-                reduced_context=reduced_context,
-                analysis=analysis.model_dump(mode="json"),
-            )
-            s.add(record)
-            s.flush()
+            analysis_id = s.execute(
+                insert(AnalysisRecord).values(
+                    rollout_id=incident_id,  # Reuse this field temporarily
+                    model_name=model_name,
+                    prompt_version=prompt_version,
+                    reduced_context=reduced_context,
+                    analysis=analysis_json,
+                )
+            ).inserted_primary_key[0]
             status_stmt = (
                 update(NamespaceIncidentRecord)
                 .where(NamespaceIncidentRecord.id == incident_id)
                 .values(
-                    analysis_id=record.id,
+                    analysis_id=analysis_id,
                     analysis_status=AnalysisStatus.DONE,
                 )
             )
@@ -611,31 +1195,29 @@ class NamespaceIncidentRepo:
         self, 
         cluster: str,
         namespace: Optional[str] = None,
-        hours: int = 1
+        hours: int = 1,
+        *,
+        session: Optional[Session] = None,
     ) -> int:
         """Count investigations (rollouts + incidents) in time window for rate limiting."""
         from datetime import timedelta
         cutoff = datetime.utcnow() - timedelta(hours=hours)
         
-        with self.session() as s:
-            # Count rollout investigations
-            rollout_stmt = select(Rollout).where(
-                Rollout.cluster == cluster,
-                Rollout.started_at >= cutoff
-            )
-            if namespace:
-                rollout_stmt = rollout_stmt.where(Rollout.namespace == namespace)
-            rollout_count = len(list(s.scalars(rollout_stmt)))
-            
-            # Count namespace incident investigations
-            incident_stmt = select(NamespaceIncidentRecord).where(
-                NamespaceIncidentRecord.cluster == cluster,
-                NamespaceIncidentRecord.started_at >= cutoff
-            )
-            if namespace:
-                incident_stmt = incident_stmt.where(NamespaceIncidentRecord.namespace == namespace)
-            incident_count = len(list(s.scalars(incident_stmt)))
-            
+        rollout_stmt = select(func.count()).select_from(Rollout).where(
+            Rollout.cluster == cluster,
+            Rollout.started_at >= cutoff
+        )
+        incident_stmt = select(func.count()).select_from(NamespaceIncidentRecord).where(
+            NamespaceIncidentRecord.cluster == cluster,
+            NamespaceIncidentRecord.started_at >= cutoff
+        )
+        if namespace:
+            rollout_stmt = rollout_stmt.where(Rollout.namespace == namespace)
+            incident_stmt = incident_stmt.where(NamespaceIncidentRecord.namespace == namespace)
+
+        with self.session(session) as s:
+            rollout_count = s.scalar(rollout_stmt)
+            incident_count = s.scalar(incident_stmt)
             return rollout_count + incident_count
 
 
@@ -0,0 +1,77 @@
+"""Rule-based answers for alerts whose name already identifies the root cause."""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Optional
+
+from .models import Analysis
+
+SEVERITIES = ("low", "medium", "high", "critical")
+
+
+def _severity(alert: dict[str, Any], default: str) -> str:
+    severity = (alert.get("severity") or "").lower()
+    return severity if severity in SEVERITIES else default
+
+
+def _summary(alert: dict[str, Any]) -> str:
+    description = alert.get("description")
+    return f"{alert.get('name')}: {description}" if description else f"{alert.get('name')} alert fired"
+
+
+def _image_pull(alert: dict[str, Any]) -> Analysis:
+    return Analysis(
+        summary=_summary(alert),
+        likely_cause="The container image cannot be pulled (wrong image name/tag or missing registry credentials).",
+        recommended_steps=[
+            "Verify the image name and tag exist in the registry.",
+            "Verify registry credentials (imagePullSecrets) for the pod's service account.",
+            "Check node network access to the registry.",
+        ],
+        severity=_severity(alert, "high"),
+    )
+
+
+def _oom_killed(alert: dict[str, Any]) -> Analysis:
+    return Analysis(
+        summary=_summary(alert),
+        likely_cause="The container exceeded its memory limit and was OOMKilled.",
+        recommended_steps=[
+            "Compare the container's memory usage with its memory limit.",
+            "Raise the memory limit or reduce the application's memory footprint.",
+            "Check for memory leaks if usage grows steadily over time.",
+        ],
+        severity=_severity(alert, "high"),
+    )
+
+
+def _crash_loop(alert: dict[str, Any]) -> Analysis:
+    return Analysis(
+        summary=_summary(alert),
+        likely_cause="The container exits repeatedly after starting (CrashLoopBackOff).",
+        recommended_steps=[
+            "Inspect the previous container logs (kubectl logs --previous) for the exit reason.",
+            "Check recent configuration, secret or dependency changes.",
+            "Verify liveness probe settings are not killing a slow-starting container.",
+        ],
+        severity=_severity(alert, "high"),
+    )
+
+
+FAST_PATH_RULES: dict[str, Callable[[dict[str, Any]], Analysis]] = {
+    "ImagePullBackOff": _image_pull,
+    "ErrImagePull": _image_pull,
+    "OOMKilled": _oom_killed,
+    "CrashLoopBackOff": _crash_loop,
+}
+
+
+def match_fast_path(alert_context: Optional[dict[str, Any]]) -> Optional[Analysis]:
+    """Return an analysis for the first alert matching a known rule, if any."""
+    if not alert_context:
+        return None
+    for alert in alert_context.get("alerts", []):
+        rule = FAST_PATH_RULES.get(alert.get("name"))
+        if rule is not None:
+            return rule(alert)
+    return None
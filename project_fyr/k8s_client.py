@@ -0,0 +1,46 @@
+"""Process-wide Kubernetes API client shared by all API wrappers."""
+
+from __future__ import annotations
+
+import functools
+import logging
+
+from kubernetes import client, config
+from urllib3.util.retry import Retry
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Transient apiserver errors are retried at the connection level so a single
+# 5xx does not abort (and force a full replay of) an investigation. Only
+# idempotent reads are retried.
+K8S_RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(500, 502, 503, 504),
+    allowed_methods=frozenset({"GET", "HEAD"}),
+)
+
+
+@functools.lru_cache(maxsize=1)
+def get_api_client() -> client.ApiClient:
+    """Return the shared ApiClient, loading cluster credentials on first use.
+
+    Every ``*Api()`` constructed without an explicit client gets its own
+    urllib3 pool (default size 4). Sharing one client lets all callers reuse
+    warm keep-alive connections instead of paying a TLS handshake per pool.
+    """
+    cfg = client.Configuration()
+    try:
+        config.load_incluster_config(client_configuration=cfg)
+        logger.info("Kubernetes client loaded in-cluster config")
+    except config.ConfigException:
+        try:
+            config.load_kube_config(client_configuration=cfg)
+            logger.info("Kubernetes client loaded kube config")
+        except Exception as e:
+            logger.warning(f"No Kubernetes config found, using client defaults: {e}")
+    cfg.connection_pool_maxsize = get_settings().k8s_pool_size
+    cfg.retries = K8S_RETRY
+    return client.ApiClient(configuration=cfg)
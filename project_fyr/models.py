@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
+from functools import partial
 from typing import Any, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+# Bound once at import; avoids the deprecated (and naive) datetime.utcnow
+_utcnow = partial(datetime.now, timezone.utc)
 
 
 class RolloutStatus(str, Enum):
@@ -37,6 +41,8 @@ class RawContext(BaseModel):
 
 
 class LogCluster(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
+
     pod: str
     container: str
     template: str
@@ -46,6 +52,8 @@ class LogCluster(BaseModel):
 
 
 class EventSummary(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
+
     reason: str
     message_template: str
     count: int
@@ -53,6 +61,8 @@ class EventSummary(BaseModel):
 
 
 class ReducedContext(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
+
     namespace: str
     deployment: str
     generation: int
@@ -65,17 +75,21 @@ class ReducedContext(BaseModel):
 
 
 class Analysis(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
+
     summary: str
     likely_cause: str
     recommended_steps: list[str]
     severity: str = Field(default="medium")
     details: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_utcnow)
     triage_team: Optional[str] = Field(default=None)
     triage_reason: Optional[str] = Field(default=None)
 
 
 class Alert(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
+
     fingerprint: str
     status: str
     starts_at: datetime
@@ -86,6 +100,8 @@ class Alert(BaseModel):
 
 
 class AlertBatch(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
+
     id: int
     summary: str
     alerts: list[Alert]
@@ -119,6 +135,8 @@ class NamespaceIncidentStatus(str, Enum):
 
 
 class AlertState(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
+
     fingerprint: str
     status: str
     last_received_at: datetime
@@ -127,6 +145,8 @@ class AlertState(BaseModel):
 
 
 class NamespaceIncident(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
+
     id: int
     cluster: str
     namespace: str
@@ -140,6 +160,9 @@ class NamespaceIncident(BaseModel):
 
 class NamespaceContext(BaseModel):
     """Context data for namespace investigation."""
+
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
+
     namespace: str
     cluster: str
     incident_type: str
@@ -0,0 +1,40 @@
+"""Shared HTTP clients for the OpenAI-backed LangChain chat models."""
+
+from __future__ import annotations
+
+import atexit
+import functools
+
+MAX_CONNECTIONS = 64
+MAX_KEEPALIVE_CONNECTIONS = 32
+
+
+def _limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_http_client():
+    """Return the process-wide sync client shared by every chat model."""
+    from openai import DefaultHttpxClient
+
+    client = DefaultHttpxClient(limits=_limits())
+    atexit.register(client.close)
+    return client
+
+
+@functools.lru_cache(maxsize=1)
+def get_async_http_client():
+    """Return the process-wide async client shared by every chat model.
+
+    Its pooled connections belong to the event loop that opened them, so it is
+    closed on that loop (see ``agent._event_loop``) rather than here.
+    """
+    from openai import DefaultAsyncHttpxClient
+
+    return DefaultAsyncHttpxClient(limits=_limits())
@@ -12,10 +12,12 @@ from typing import Any
 
 from kubernetes import client, config, watch
 from kubernetes.config.config_exception import ConfigException
+from prometheus_client import Counter
 
 from .agent import InvestigatorAgent
-from .config import Settings, settings
-from .db import RolloutRepo, AlertRepo, init_db
+from .config import Settings, get_settings
+from .db import RolloutRepo, AlertRepo, get_engine
+from .k8s_client import get_api_client
 from .models import NotifyStatus, ReducedContext, RolloutStatus, Alert
 from .slack import SlackNotifier
 from .triage import triage_failure
@@ -23,6 +25,12 @@ from .triage import triage_failure
 
 logger = logging.getLogger(__name__)
 
+ANALYZER_LLM_SKIPPED = Counter(
+    'project_fyr_analyzer_llm_skipped_total',
+    'Failed rollouts whose analysis was skipped without an LLM investigation',
+    ['reason']  # stable
+)
+
 
 class AlertBatcher:
     def __init__(self, repo: AlertRepo, config: Settings):
@@ -36,37 +44,33 @@ class AlertBatcher:
         now = datetime.utcnow()
         window_start = now - timedelta(seconds=self._window)
         
-        alerts = self._repo.get_unbatched_alerts(window_start)
-        if not alerts:
-            return
-
         # Simple grouping: by namespace + service (if label exists)
         # Fallback: by alertname
-        groups: dict[str, list] = {}
+        groups: dict[tuple[str, str], list] = {}
         
-        for alert in alerts:
+        # Rows stream from the database; only the grouped rows are kept
+        for alert in self._repo.iter_unbatched_alerts(window_start):
             # Check if alert is old enough to be batched (wait for window to close slightly?)
             # For simplicity, we batch everything that is in the window.
             # Real implementation might wait until alert.received_at < now - window/2
             
             ns = alert.labels.get("namespace", "default")
             svc = alert.labels.get("service") or alert.labels.get("app") or "unknown"
-            key = f"{ns}/{svc}"
+            # Group on the (namespace, service) pair itself; no string key to split later
+            key = (ns, svc)
             if key not in groups:
                 groups[key] = []
             groups[key].append(alert)
 
-        for key, group in groups.items():
+        for (ns, svc), group in groups.items():
             if len(group) < self._min_count:
                 continue
-                
-            ns, svc = key.split("/", 1)
             
             # Summary
             alert_names = list(set(a.labels.get("alertname", "unknown") for a in group))
-            summary = f"Batch of {len(group)} alerts for {key}. Alerts: {', '.join(alert_names)}"
+            summary = f"Batch of {len(group)} alerts for {ns}/{svc}. Alerts: {', '.join(alert_names)}"
             
-            logger.info(f"Creating batch for {key} with {len(group)} alerts")
+            logger.info(f"Creating batch for {ns}/{svc} with {len(group)} alerts")
             self._repo.create_batch(
                 alerts=group,
                 summary=summary,
@@ -78,263 +82,13 @@ class AlertBatcher:
             )
 
 
-class AnalysisWorker:
-    def __init__(self, repo: RolloutRepo, alert_repo: AlertRepo, cluster: str, config: Settings):
-        self._repo = repo
-        self._alert_repo = alert_repo
-        self._cluster = cluster
-        self._config = config
-        self._agent = InvestigatorAgent(
-            model_name=config.langchain_model_name,
-            api_key=config.openai_api_key,
-            api_base=config.openai_api_base,
-            api_version=config.openai_api_version,
-            azure_deployment=config.azure_deployment,
-        )
-        # Store config for namespace agent creation
-        self._agent._api_key = config.openai_api_key
-        self._agent._api_base = config.openai_api_base
-        self._agent._api_version = config.openai_api_version
-        self._agent._azure_deployment = config.azure_deployment
-        self._slack = SlackNotifier(
-            token=config.slack_bot_token,
-            default_channel=config.slack_default_channel,
-            mock_log_file=config.slack_mock_log_file,
-            base_url=config.slack_api_url,
-        )
-
-    def loop(self):
-        while True:
-            # 1. Process Rollouts (Legacy/Existing path)
-            self._process_rollouts()
-            
-            # 2. Process Alert Jobs
-            self._process_alert_jobs()
-            
-            # 3. Process Namespace Investigation Jobs
-            self._process_namespace_jobs()
-            
-            time.sleep(15)
-
-    def _process_rollouts(self):
-        rollouts = self._repo.list_failed(self._cluster)
-        for rollout in rollouts:
-            try:
-                logger.info(f"Starting investigation for rollout {rollout.namespace}/{rollout.deployment}")
-                self._investigate_rollout(rollout)
-            except Exception as exc:
-                logger.error(f"rollout analysis error: {exc}")
-
-    def _investigate_rollout(self, rollout):
-        # Agentic investigation
-        analysis = self._agent.investigate(rollout.deployment, rollout.namespace)
-        
-        # Create a dummy ReducedContext for DB compatibility
-        reduced = ReducedContext(
-            namespace=rollout.namespace,
-            deployment=rollout.deployment,
-            generation=rollout.generation,
-            summary="Agentic Investigation",
-            phase="FAILED",
-            failing_pods=[],
-            log_clusters=[],
-            events=[],
-            argocd_status=None,
-        )
-
-        triage = triage_failure(reduced, analysis)
-        analysis.triage_team = triage.team
-        analysis.triage_reason = triage.reason
-        
-        metadata = rollout_metadata_dict(rollout)
-        metadata.update(
-            {
-                "triage_team": triage.team,
-                "triage_reason": triage.reason,
-            }
-        )
-        
-        channel = rollout.slack_channel
-        rollout_ref = f"{rollout.namespace}/{rollout.deployment}#{rollout.generation}"
-        
-        sent = self._slack.send_analysis(
-            channel=channel,
-            rollout_ref=rollout_ref,
-            analysis=analysis,
-            metadata=metadata,
-        )
-        
-        self._repo.update_notify_status(
-            rollout.id, NotifyStatus.SENT if sent else NotifyStatus.FAILED
-        )
-        
-        self._repo.append_analysis(
-            rollout.id,
-            reduced_context=reduced,
-            analysis=analysis,
-            model_name=self._config.langchain_model_name,
-        )
-
-    def _process_alert_jobs(self):
-        jobs = self._alert_repo.get_pending_jobs()
-        for job in jobs:
-            try:
-                logger.info(f"Processing alert job {job.id} for batch {job.alert_batch_id}")
-                self._investigate_alert_batch(job)
-            except Exception as exc:
-                logger.error(f"alert job error: {exc}")
-                self._alert_repo.update_job_status(job.id, "failed")
-
-    def _investigate_alert_batch(self, job):
-        self._alert_repo.update_job_status(job.id, "running", started_at=datetime.utcnow())
-        
-        batch = self._alert_repo.get_batch(job.alert_batch_id)
-        if not batch:
-            logger.error(f"Batch {job.alert_batch_id} not found")
-            self._alert_repo.update_job_status(job.id, "failed")
-            return
-
-        alerts = self._alert_repo.get_batch_alerts(batch.id)
-        
-        # Prepare context
-        alert_context = {
-            "summary": batch.context_summary,
-            "alerts": [
-                {
-                    "name": a.labels.get("alertname"),
-                    "severity": a.labels.get("severity"),
-                    "instance": a.labels.get("instance"),
-                    "description": a.annotations.get("description") or a.annotations.get("message"),
-                    "starts_at": str(a.starts_at)
-                }
-                for a in alerts
-            ]
-        }
-        
-        # Deployment/Namespace might be inferred
-        deployment = batch.service or "unknown"
-        namespace = batch.namespace or "default"
-        
-        # Agent investigation
-        analysis = self._agent.investigate(deployment, namespace, alert_context=alert_context)
-        
-        # Notify Slack
-        # We need to adapt SlackNotifier to handle alerts or just format it as generic message
-        # For now, let's reuse send_analysis but with alert-specific ref
-        
-        ref = f"AlertBatch #{batch.id} ({namespace}/{deployment})"
-        
-        # We don't have a rollout ID, so we can't use append_analysis easily without refactoring DB
-        # But we have InvestigationJob.analysis_id.
-        # We need to store the analysis somewhere. 
-        # The current schema links AnalysisRecord to Rollout via rollout_id.
-        # We should probably make rollout_id nullable in AnalysisRecord or add alert_batch_id.
-        # For this iteration, let's just log and notify Slack.
-        
-        self._slack.send_analysis(
-            channel=self._config.slack_default_channel,
-            rollout_ref=ref,
-            analysis=analysis,
-            metadata={"type": "alert", "batch_id": batch.id}
-        )
-        
-        self._alert_repo.update_job_status(job.id, "done", completed_at=datetime.utcnow())
-    
-    def _process_namespace_jobs(self):
-        """Process pending namespace investigation jobs."""
-        jobs = self._alert_repo.get_pending_namespace_jobs()
-        for job in jobs:
-            try:
-                logger.info(f"Processing namespace job {job.id} for incident {job.namespace_incident_id}")
-                self._investigate_namespace_incident(job)
-            except Exception as exc:
-                logger.error(f"namespace job error: {exc}")
-                self._alert_repo.update_job_status(job.id, "failed")
-    
-    def _investigate_namespace_incident(self, job):
-        """Investigate a namespace incident using the agent."""
-        from .db import NamespaceIncidentRepo
-        
-        self._alert_repo.update_job_status(job.id, "running", started_at=datetime.utcnow())
-        
-        # Get the namespace incident
-        incident_repo = NamespaceIncidentRepo(self._repo._engine)
-        incident = incident_repo.get_by_id(job.namespace_incident_id)
-        
-        if not incident:
-            logger.error(f"Namespace incident {job.namespace_incident_id} not found")
-            self._alert_repo.update_job_status(job.id, "failed")
-            return
-        
-        # Update incident status to INVESTIGATING
-        from .models import NamespaceIncidentStatus
-        incident_repo.update_status(incident.id, NamespaceIncidentStatus.INVESTIGATING)
-        
-        # Run agent investigation
-        analysis = self._agent.investigate_namespace(
-            namespace=incident.namespace,
-            cluster=incident.cluster,
-            incident_type=incident.incident_type,
-            started_at=str(incident.started_at),
-            metadata=incident.metadata or {}
-        )
-        
-        # Build context dict for storage
-        from .models import NamespaceContext
-        context = NamespaceContext(
-            namespace=incident.namespace,
-            cluster=incident.cluster,
-            incident_type=incident.incident_type,
-            metadata=incident.metadata or {}
-        )
-        
-        # Store analysis in incident
-        incident_repo.append_analysis(
-            incident.id,
-            context=context,
-            analysis=analysis,
-            model_name=self._config.langchain_model_name
-        )
-        
-        # Send Slack notification
-        ref = f"Namespace {incident.namespace} - {incident.incident_type}"
-        metadata = {
-            "cluster": incident.cluster,
-            "incident_type": incident.incident_type,
-            "started_at": str(incident.started_at),
-        }
-        if incident.metadata:
-            metadata.update(incident.metadata)
-        
-        channel = incident.slack_channel or self._config.slack_default_channel
-        sent = self._slack.send_analysis(
-            channel=channel,
-            rollout_ref=ref,
-            analysis=analysis,
-            metadata=metadata
-        )
-        
-        # Update incident notify status
-        from .models import NotifyStatus
-        incident_repo.update_notify_status(
-            incident.id, 
-            NotifyStatus.SENT if sent else NotifyStatus.FAILED
-        )
-        
-        # Mark job as completed
-        self._alert_repo.update_job_status(
-            job.id,
-            "completed",
-            completed_at=datetime.utcnow(),
-            analysis_summary=analysis.summary
-        )
-
-
 class WatcherService:
     def __init__(self, config: Settings | None = None):
-        self._config = config or settings
-        self._engine = init_db(self._config.database_url)
+        self._config = config or get_settings()
+        self._engine = get_engine(self._config.database_url)
         self._repo = RolloutRepo(self._engine)
+        self._alert_repo = AlertRepo(self._engine)
+        self._batcher = AlertBatcher(self._alert_repo, self._config)
 
     def start(self):
         try:
@@ -378,8 +132,8 @@ class WatcherService:
             t.join()
 
     def _watch_loop(self, cluster: str):
-        v1_apps = client.AppsV1Api()
-        core_v1 = client.CoreV1Api()
+        v1_apps = client.AppsV1Api(get_api_client())
+        core_v1 = client.CoreV1Api(get_api_client())
         namespace_cache = NamespaceMetadataCache(core_v1)
         w = watch.Watch()
         
@@ -407,9 +161,9 @@ class WatcherService:
                 time.sleep(2)
 
     def _reconcile_loop(self, cluster: str):
-        v1_apps = client.AppsV1Api()
+        v1_apps = client.AppsV1Api(get_api_client())
         timeout = timedelta(seconds=self._config.rollout_timeout_seconds)
-        core_v1 = client.CoreV1Api()
+        core_v1 = client.CoreV1Api(get_api_client())
         while True:
             now = datetime.utcnow()
             rollouts = self._repo.list_active(cluster)
@@ -426,7 +180,7 @@ class WatcherService:
         from .db import NamespaceIncidentRepo
         from .models import NamespaceIncidentType
         
-        core_v1 = client.CoreV1Api()
+        core_v1 = client.CoreV1Api(get_api_client())
         incident_repo = NamespaceIncidentRepo(self._engine)
         
         logger.info(f"Starting namespace monitor loop (interval: {self._config.namespace_monitoring_interval_seconds}s)")
@@ -553,7 +307,6 @@ class WatcherService:
             job = InvestigationJob(**job_data)
             s.add(job)
             s.commit()
-            s.refresh(job)
             logger.info(f"Created investigation job {job.id} for {job_type} {resource_id}")
     
     def _check_rate_limits(self, cluster: str, namespace: str, incident_repo) -> bool:
@@ -577,73 +330,28 @@ class WatcherService:
         return True
 
 
-def main():
-    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
-    service = WatcherService()
-    service.start()
-
-
-class AnalyzerService:
-    def __init__(self, config: Settings | None = None):
-        self._config = config or settings
-        self._engine = init_db(self._config.database_url)
-        self._repo = RolloutRepo(self._engine)
-        self._alert_repo = AlertRepo(self._engine)
-        self._batcher = AlertBatcher(self._alert_repo, self._config)
-
-    def start(self):
-        try:
-            config.load_incluster_config()
-            logger.info("Analyzer loaded in-cluster config")
-        except ConfigException:
-            config.load_kube_config()
-            logger.info("Analyzer loaded kube config")
-
-        # Start Prometheus metrics server in a background thread
-        self._start_metrics_server()
-        
-        # Start Batcher thread
-        batcher_thread = threading.Thread(
-            target=self._batcher_loop,
-            daemon=True,
-            name="alert-batcher"
-        )
-        batcher_thread.start()
-
-        worker = AnalysisWorker(self._repo, self._alert_repo, self._config.k8s_cluster_name, self._config)
-        worker.loop()
-    
-    def _batcher_loop(self):
-        while True:
-            try:
-                self._batcher.run_once()
-            except Exception as e:
-                logger.error(f"Batcher error: {e}")
-            time.sleep(10)
-    
-    def _start_metrics_server(self):
-        """Start Prometheus metrics HTTP server on port 8000."""
-        from prometheus_client import start_http_server
-        try:
-            start_http_server(8000)
-            logger.info("Prometheus metrics server started on port 8000")
-        except Exception as e:
-            logger.warning(f"Failed to start Prometheus metrics server: {e}")
-    """Map a Deployment status object to a coarse rollout phase."""
-
 def evaluate_deployment_phase(dep) -> str:
     """Map a Deployment status object to a coarse rollout phase."""
 
     status = dep.status or None
     available = getattr(status, "available_replicas", None) or getattr(status, "availableReplicas", None)
     desired = getattr(dep.spec, "replicas", 0) or 0
-    conditions = {c.type: c.status for c in (getattr(status, "conditions", []) or [])}
 
+    # Checked before touching conditions: most deployments watched are stable
     if available is not None and desired > 0 and available >= desired:
         return "STABLE"
-    if conditions.get("Progressing") == "False":
+
+    # Only two condition types matter; read them in one scan without building a map
+    progressing = available_condition = None
+    for c in getattr(status, "conditions", None) or ():
+        if c.type == "Progressing":
+            progressing = c.status
+        elif c.type == "Available":
+            available_condition = c.status
+
+    if progressing == "False":
         return "FAILED_PROGRESS"
-    if conditions.get("Available") == "False":
+    if available_condition == "False":
         return "PENDING"
     return "ROLLING_OUT"
 
@@ -652,6 +360,10 @@ def list_deployment_pods(core_v1: client.CoreV1Api, dep) -> list:
     ns = dep.metadata.namespace
     selector = dep.spec.selector.match_labels or {}
     label_selector = ",".join(f"{k}={v}" for k, v in selector.items())
+    if not label_selector:
+        # An empty selector would list every pod in the namespace; treat it as a misconfiguration
+        logger.warning(f"Deployment {ns}/{dep.metadata.name} has no matchLabels selector, skipping pod listing")
+        return []
     pods = core_v1.list_namespaced_pod(namespace=ns, label_selector=label_selector)
     return pods.items
 
@@ -757,7 +469,7 @@ def handle_deployment_event(
     if event_type == "DELETED":
         return
 
-    cfg = config or settings
+    cfg = config or get_settings()
     labels = dep.metadata.labels or {}
     annotations = dep.metadata.annotations or {}
     ns_meta = namespace_metadata or {}
@@ -781,32 +493,30 @@ def handle_deployment_event(
     generation = dep.metadata.generation or 1
     ns_meta = namespace_metadata or {}
 
-    rollout = repo.get_by_key(cluster, ns, name, generation)
     phase = evaluate_deployment_phase(dep)
-    now = datetime.utcnow()
-
-    if rollout is None:
-        status = RolloutStatus.PENDING if phase == "PENDING" else RolloutStatus.ROLLING_OUT
-        repo.create(
-            cluster=cluster,
-            namespace=ns,
-            deployment=name,
-            generation=generation,
-            status=status,
-            started_at=now,
-            origin="k8s",
-            metadata_json=ns_meta.get("metadata_json") or {},
-            team=ns_meta.get("team"),
-            slack_channel=ns_meta.get("slack_channel"),
-        )
-    else:
-        if ns_meta:
-            repo.update_metadata(
-                rollout.id,
-                metadata_json=ns_meta.get("metadata_json"),
-                team=ns_meta.get("team"),
-                slack_channel=ns_meta.get("slack_channel"),
-            )
+    status = RolloutStatus.PENDING if phase == "PENDING" else RolloutStatus.ROLLING_OUT
+
+    # Creates the rollout on first sight, otherwise refreshes its namespace metadata
+    repo.upsert(
+        cluster=cluster,
+        namespace=ns,
+        deployment=name,
+        generation=generation,
+        metadata_json=ns_meta.get("metadata_json"),
+        team=ns_meta.get("team"),
+        slack_channel=ns_meta.get("slack_channel"),
+        status=status,
+        started_at=datetime.utcnow(),
+        origin="k8s",
+    )
+
+    # A failed rollout that has since become healthy has nothing left to diagnose;
+    # close out its analysis here, from the event in hand, instead of running the agent
+    if phase == "STABLE" and repo.skip_analysis(
+        cluster=cluster, namespace=ns, deployment=name, generation=generation,
+        reason="stabilized, LLM skipped",
+    ):
+        ANALYZER_LLM_SKIPPED.labels(reason='stable').inc()
 
 
 def reconcile_rollout(
@@ -850,8 +560,9 @@ def reconcile_rollout(
 
 
 class AnalysisWorker:
-    def __init__(self, repo: RolloutRepo, cluster: str, config: Settings):
+    def __init__(self, repo: RolloutRepo, alert_repo: AlertRepo, cluster: str, config: Settings):
         self._repo = repo
+        self._alert_repo = alert_repo
         self._cluster = cluster
         self._config = config
         self._agent = InvestigatorAgent(
@@ -870,71 +581,144 @@ class AnalysisWorker:
 
     def loop(self):
         while True:
-            rollouts = self._repo.list_failed(self._cluster)
-            for rollout in rollouts:
-                try:
-                    logger.info(f"Starting investigation for {rollout.namespace}/{rollout.deployment}")
-                    
-                    # Agentic investigation
-                    analysis = self._agent.investigate(rollout.deployment, rollout.namespace)
-                    
-                    # Create a dummy ReducedContext for DB compatibility
-                    # The agent pulls data dynamically, so we don't have a static reduced context to store.
-                    # We store a placeholder to satisfy the schema.
-                    reduced = ReducedContext(
-                        namespace=rollout.namespace,
-                        deployment=rollout.deployment,
-                        generation=rollout.generation,
-                        summary="Agentic Investigation",
-                        phase="FAILED", # Assumed since we are processing failed rollouts
-                        failing_pods=[],
-                        log_clusters=[],
-                        events=[],
-                        argocd_status=None,
-                    )
-
-                    triage = triage_failure(reduced, analysis)
-                    analysis.triage_team = triage.team
-                    analysis.triage_reason = triage.reason
-                    
-                    metadata = rollout_metadata_dict(rollout)
-                    metadata.update(
-                        {
-                            "triage_team": triage.team,
-                            "triage_reason": triage.reason,
-                        }
-                    )
-                    
-                    # Save analysis FIRST, before attempting Slack notification
-                    # This ensures we don't lose the analysis if Slack fails
-                    self._repo.append_analysis(
-                        rollout.id,
-                        reduced_context=reduced,
-                        analysis=analysis,
-                        model_name=self._config.langchain_model_name,
-                    )
-                    
-                    # Now try to send Slack notification
-                    channel = rollout.slack_channel
-                    rollout_ref = f"{rollout.namespace}/{rollout.deployment}#{rollout.generation}"
-                    
-                    try:
-                        sent = self._slack.send_analysis(
-                            channel=channel,
-                            rollout_ref=rollout_ref,
-                            analysis=analysis,
-                            metadata=metadata,
-                        )
-                        self._repo.update_notify_status(
-                            rollout.id, NotifyStatus.SENT if sent else NotifyStatus.FAILED
-                        )
-                    except Exception as slack_exc:
-                        logger.warning(f"Failed to send Slack notification: {slack_exc}")
-                        self._repo.update_notify_status(rollout.id, NotifyStatus.FAILED)
-                except Exception as exc:  # pragma: no cover - diagnostic path
-                    logger.error(f"analysis loop error: {exc}")
+            self.run_once()
             time.sleep(15)
 
+    def run_once(self):
+        self._process_rollouts()
+
+        # One query for every pending job, partitioned by type. Namespace jobs
+        # stay queued: there is no namespace investigation in the agent yet.
+        jobs = self._alert_repo.get_all_pending_jobs()
+        self._process_alert_jobs(jobs.get("alert", []))
+
+    def _process_rollouts(self):
+        rollouts = self._repo.list_failed(self._cluster)
+        if not rollouts:
+            return
+        logger.info(f"Starting investigation for {len(rollouts)} failed rollouts")
+        try:
+            # Agentic investigations are independent, so run them concurrently
+            analyses = self._agent.investigate_many(
+                [(rollout.deployment, rollout.namespace) for rollout in rollouts],
+                max_concurrency=self._config.agent_max_concurrency,
+            )
+        except Exception as exc:  # pragma: no cover - diagnostic path
+            logger.error(f"analysis loop error: {exc}")
+            analyses = []
+        for rollout, analysis in zip(rollouts, analyses):
+            try:
+                self._record_analysis(rollout, analysis)
+            except Exception as exc:  # pragma: no cover - diagnostic path
+                logger.error(f"analysis loop error: {exc}")
+
+    def _process_alert_jobs(self, jobs):
+        for job in jobs:
+            try:
+                logger.info(f"Processing alert job {job.id} for batch {job.alert_batch_id}")
+                self._investigate_alert_batch(job)
+            except Exception as exc:
+                logger.error(f"alert job error: {exc}")
+                self._alert_repo.update_job_status(job.id, "failed")
+
+    def _investigate_alert_batch(self, job):
+        self._alert_repo.update_job_status(job.id, "running", started_at=datetime.utcnow())
+
+        with self._alert_repo.session() as s:
+            batch = self._alert_repo.get_batch(job.alert_batch_id, session=s)
+            alerts = self._alert_repo.get_batch_alerts(batch.id, session=s) if batch else []
+        if not batch:
+            logger.error(f"Batch {job.alert_batch_id} not found")
+            self._alert_repo.update_job_status(job.id, "failed")
+            return
+
+        alert_context = {
+            "summary": batch.context_summary,
+            "alerts": [
+                {
+                    "name": a.labels.get("alertname"),
+                    "severity": a.labels.get("severity"),
+                    "instance": a.labels.get("instance"),
+                    "description": a.annotations.get("description") or a.annotations.get("message"),
+                    "starts_at": str(a.starts_at)
+                }
+                for a in alerts
+            ]
+        }
+
+        # Deployment/Namespace are inferred from the batch grouping
+        deployment = batch.service or "unknown"
+        namespace = batch.namespace or "default"
+
+        analysis = self._agent.investigate(deployment, namespace, alert_context=alert_context)
+
+        # Analyses are linked to rollouts, so alert batch results are only sent to Slack
+        self._slack.send_analysis(
+            channel=self._config.slack_default_channel,
+            rollout_ref=f"AlertBatch #{batch.id} ({namespace}/{deployment})",
+            analysis=analysis,
+            metadata={"type": "alert", "batch_id": batch.id}
+        )
+
+        self._alert_repo.update_job_status(job.id, "done", completed_at=datetime.utcnow())
+
+    def _record_analysis(self, rollout, analysis):
+        # Create a dummy ReducedContext for DB compatibility (built from our own
+        # rollout row, so model_construct skips validation)
+        # The agent pulls data dynamically, so we don't have a static reduced context to store.
+        # We store a placeholder to satisfy the schema.
+        reduced = ReducedContext.model_construct(
+            namespace=rollout.namespace,
+            deployment=rollout.deployment,
+            generation=rollout.generation,
+            summary="Agentic Investigation",
+            phase="FAILED", # Assumed since we are processing failed rollouts
+            failing_pods=[],
+            log_clusters=[],
+            events=[],
+            argocd_status=None,
+        )
+
+        triage = triage_failure(reduced, analysis)
+        analysis = analysis.model_copy(
+            update={"triage_team": triage.team, "triage_reason": triage.reason}
+        )
+
+        metadata = rollout_metadata_dict(rollout)
+        metadata.update(
+            {
+                "triage_team": triage.team,
+                "triage_reason": triage.reason,
+            }
+        )
+
+        # Save analysis FIRST, before attempting Slack notification
+        # This ensures we don't lose the analysis if Slack fails
+        self._repo.append_analysis(
+            rollout.id,
+            reduced_context=reduced,
+            analysis=analysis,
+            model_name=self._config.langchain_model_name,
+        )
+
+        # Now try to send Slack notification
+        channel = rollout.slack_channel
+        rollout_ref = f"{rollout.namespace}/{rollout.deployment}#{rollout.generation}"
+
+        try:
+            sent = self._slack.send_analysis(
+                channel=channel,
+                rollout_ref=rollout_ref,
+                analysis=analysis,
+                metadata=metadata,
+            )
+            self._repo.update_notify_status(
+                rollout.id, NotifyStatus.SENT if sent else NotifyStatus.FAILED
+            )
+        except Exception as slack_exc:
+            logger.warning(f"Failed to send Slack notification: {slack_exc}")
+            self._repo.update_notify_status(rollout.id, NotifyStatus.FAILED)
+
 
 
 def main():
@@ -945,9 +729,11 @@ def main():
 
 class AnalyzerService:
     def __init__(self, config: Settings | None = None):
-        self._config = config or settings
-        self._engine = init_db(self._config.database_url)
+        self._config = config or get_settings()
+        self._engine = get_engine(self._config.database_url)
         self._repo = RolloutRepo(self._engine)
+        self._alert_repo = AlertRepo(self._engine)
+        self._batcher = AlertBatcher(self._alert_repo, self._config)
 
     def start(self):
         try:
@@ -960,8 +746,20 @@ class AnalyzerService:
         # Start Prometheus metrics server in a background thread
         self._start_metrics_server()
 
-        worker = AnalysisWorker(self._repo, self._config.k8s_cluster_name, self._config)
+        # Groups incoming alerts into batches and queues their investigation jobs
+        batcher_thread = threading.Thread(target=self._batcher_loop, daemon=True, name="alert-batcher")
+        batcher_thread.start()
+
+        worker = AnalysisWorker(self._repo, self._alert_repo, self._config.k8s_cluster_name, self._config)
         worker.loop()
+
+    def _batcher_loop(self):
+        while True:
+            try:
+                self._batcher.run_once()
+            except Exception as e:
+                logger.error(f"Batcher error: {e}")
+            time.sleep(10)
     
     def _start_metrics_server(self):
         """Start Prometheus metrics HTTP server on port 8000."""
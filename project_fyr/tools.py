@@ -2,42 +2,33 @@
 
 from __future__ import annotations
 
+import heapq
+import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 import yaml
 import requests
-from kubernetes import client, config
+from kubernetes import client
 from kubernetes.client.rest import ApiException
 from langchain_core.tools import tool
 
-from .config import settings
+from .config import get_settings
+from .k8s_client import get_api_client
 
 logger = logging.getLogger(__name__)
 
 
 def _get_core_v1() -> client.CoreV1Api:
-    try:
-        return client.CoreV1Api()
-    except Exception:
-        # Fallback if not initialized (though service.py should have done it)
-        try:
-            config.load_incluster_config()
-        except config.ConfigException:
-            config.load_kube_config()
-        return client.CoreV1Api()
+    return client.CoreV1Api(get_api_client())
 
 
 def _get_apps_v1() -> client.AppsV1Api:
-    try:
-        return client.AppsV1Api()
-    except Exception:
-        try:
-            config.load_incluster_config()
-        except config.ConfigException:
-            config.load_kube_config()
-        return client.AppsV1Api()
+    return client.AppsV1Api(get_api_client())
 
 
 def _clean_metadata(obj: dict) -> dict:
@@ -183,20 +174,19 @@ def k8s_events(namespace: str, involved_object_name: Optional[str] = None) -> st
     core_v1 = _get_core_v1()
     
     try:
-        events = core_v1.list_namespaced_event(namespace).items
+        # Let the apiserver filter by object instead of shipping the whole namespace
+        field_selector = f"involvedObject.name={involved_object_name}" if involved_object_name else None
+        events = core_v1.list_namespaced_event(namespace, field_selector=field_selector).items
         
-        # Sort by timestamp descending
-        events.sort(key=lambda x: x.last_timestamp or x.event_time or x.creation_timestamp, reverse=True)
+        # Only the 20 newest are shown; select them without sorting the whole namespace
+        events = heapq.nlargest(20, events, key=lambda x: x.last_timestamp or x.event_time or x.creation_timestamp)
         
         output = []
         for e in events:
-            if involved_object_name and e.involved_object.name != involved_object_name:
-                continue
-                
             ts = e.last_timestamp or e.event_time or e.creation_timestamp
             output.append(f"[{ts}] {e.type} {e.reason} ({e.involved_object.kind}/{e.involved_object.name}): {e.message}")
             
-        return "\n".join(output[:20]) if output else "No events found."
+        return "\n".join(output) if output else "No events found."
         
     except ApiException as e:
         return f"Error listing events: {e.reason}"
@@ -205,14 +195,25 @@ def k8s_events(namespace: str, involved_object_name: Optional[str] = None) -> st
 
 
 def _get_custom_objects_api() -> client.CustomObjectsApi:
-    try:
-        return client.CustomObjectsApi()
-    except Exception:
-        try:
-            config.load_incluster_config()
-        except config.ConfigException:
-            config.load_kube_config()
-        return client.CustomObjectsApi()
+    return client.CustomObjectsApi(get_api_client())
+
+
+# Most workloads are not managed by ArgoCD, and the agent tends to probe for an
+# Application anyway. Remember recent 404s so repeated probes skip the apiserver.
+ARGOCD_MISS_TTL_SECONDS = 300
+_argocd_misses: dict[tuple[str, str], float] = {}
+_argocd_misses_lock = threading.Lock()
+
+
+def _argocd_recently_missing(name: str, namespace: str) -> bool:
+    with _argocd_misses_lock:
+        missed_at = _argocd_misses.get((name, namespace))
+        if missed_at is None:
+            return False
+        if time.time() - missed_at < ARGOCD_MISS_TTL_SECONDS:
+            return True
+        del _argocd_misses[(name, namespace)]
+        return False
 
 
 @tool
@@ -224,6 +225,9 @@ def k8s_get_argocd_application(name: str, namespace: str = "argocd") -> str:
         name: The name of the ArgoCD Application.
         namespace: The namespace where ArgoCD is installed (default: "argocd").
     """
+    if _argocd_recently_missing(name, namespace):
+        return f"ArgoCD Application '{name}' not found in namespace '{namespace}'."
+
     api = _get_custom_objects_api()
     try:
         # ArgoCD Applications are usually in group argoproj.io, version v1alpha1
@@ -260,6 +264,8 @@ def k8s_get_argocd_application(name: str, namespace: str = "argocd") -> str:
         
     except ApiException as e:
         if e.status == 404:
+            with _argocd_misses_lock:
+                _argocd_misses[(name, namespace)] = time.time()
             return f"ArgoCD Application '{name}' not found in namespace '{namespace}'."
         return f"Error getting ArgoCD Application: {e.reason}"
     except Exception as e:
@@ -392,14 +398,7 @@ def k8s_get_storage(namespace: str) -> str:
 
 
 def _get_networking_v1() -> client.NetworkingV1Api:
-    try:
-        return client.NetworkingV1Api()
-    except Exception:
-        try:
-            config.load_incluster_config()
-        except config.ConfigException:
-            config.load_kube_config()
-        return client.NetworkingV1Api()
+    return client.NetworkingV1Api(get_api_client())
 
 
 @tool
@@ -495,14 +494,7 @@ def k8s_get_nodes() -> str:
 
 
 def _get_auth_v1() -> client.AuthorizationV1Api:
-    try:
-        return client.AuthorizationV1Api()
-    except Exception:
-        try:
-            config.load_incluster_config()
-        except config.ConfigException:
-            config.load_kube_config()
-        return client.AuthorizationV1Api()
+    return client.AuthorizationV1Api(get_api_client())
 
 
 @tool
@@ -644,7 +636,7 @@ def k8s_query_prometheus(
         pod_pattern: Optional pod name pattern (regex) to filter by
         lookback_minutes: How many minutes to look back (default 60)
     """
-    if not settings.prometheus_url:
+    if not get_settings().prometheus_url:
         return "Prometheus is not configured. Set PROJECT_FYR_PROMETHEUS_URL environment variable."
     
     try:
@@ -662,7 +654,7 @@ def k8s_query_prometheus(
         promql = promql_queries.get(query, query)
         
         # Query Prometheus
-        url = f"{settings.prometheus_url.rstrip('/')}/api/v1/query"
+        url = f"{get_settings().prometheus_url.rstrip('/')}/api/v1/query"
         response = requests.get(
             url,
             params={"query": promql},
@@ -723,6 +715,70 @@ def k8s_query_prometheus(
         return f"Error querying Prometheus: {str(e)}"
 
 
+MAX_BATCH_INVOCATIONS = 10
+
+
+@tool
+def k8s_batch(invocations: list[dict[str, Any]]) -> str:
+    """
+    Run several independent inspection tools concurrently and return all of their outputs.
+    
+    Use this instead of calling tools one at a time when the inspections do not depend on
+    each other (e.g. events + describe + logs for a pod already known to be crashing).
+    
+    Args:
+        invocations: List of tool calls, each {"tool": "<tool name>", "args": {...}}, e.g.
+            [{"tool": "k8s_events", "args": {"namespace": "prod", "involved_object_name": "api-7d9f"}},
+             {"tool": "k8s_logs", "args": {"name": "api-7d9f", "namespace": "prod", "previous": true}}]
+            At most 10 invocations per batch.
+    """
+    if not invocations:
+        return "Error: No invocations provided"
+    if len(invocations) > MAX_BATCH_INVOCATIONS:
+        return f"Error: At most {MAX_BATCH_INVOCATIONS} invocations per batch (got {len(invocations)})"
+
+    def dispatch(invocation: dict[str, Any]) -> str:
+        name = invocation.get("tool")
+        target = _BATCHABLE_TOOLS.get(name)
+        if target is None:
+            return f"Error: Unknown tool '{name}'"
+        try:
+            return target.invoke(invocation.get("args") or {})
+        except Exception as e:
+            return f"Error running {name}: {str(e)}"
+
+    with ThreadPoolExecutor(max_workers=len(invocations)) as pool:
+        outputs = list(pool.map(dispatch, invocations))
+
+    sections = []
+    for invocation, output in zip(invocations, outputs):
+        args = json.dumps(invocation.get("args") or {}, sort_keys=True)
+        sections.append(f"### {invocation.get('tool')} {args}\n{output}")
+    return "\n\n".join(sections)
+
+
+_BATCHABLE_TOOLS = {
+    t.name: t
+    for t in (
+        k8s_get_resources,
+        k8s_describe,
+        k8s_logs,
+        k8s_events,
+        k8s_get_argocd_application,
+        k8s_list_helm_releases,
+        k8s_get_configmap,
+        k8s_get_secret_structure,
+        k8s_get_storage,
+        k8s_get_network,
+        k8s_get_nodes,
+        k8s_check_rbac,
+        k8s_get_network_policies,
+        k8s_get_endpoints,
+        k8s_query_prometheus,
+    )
+}
+
+
 # Namespace-specific investigation tools
 
 @tool
@@ -889,15 +945,15 @@ def get_namespace_events(namespace: str, last_minutes: int = 60) -> str:
             return f"No events found in namespace {namespace}"
         
         # Filter by time
-        cutoff = datetime.utcnow() - timedelta(minutes=last_minutes)
+        # Kubernetes timestamps are timezone-aware (UTC); compare them directly
+        cutoff = datetime.now(timezone.utc) - timedelta(minutes=last_minutes)
         recent_events = []
         
         for event in events:
-            if event.last_timestamp:
-                # Handle timezone-aware datetime
-                event_time = event.last_timestamp
-                if event_time.tzinfo:
-                    event_time = event_time.replace(tzinfo=None)
+            event_time = event.last_timestamp
+            if event_time:
+                if event_time.tzinfo is None:
+                    event_time = event_time.replace(tzinfo=timezone.utc)
                 
                 if event_time >= cutoff:
                     recent_events.append(event)
@@ -905,12 +961,12 @@ def get_namespace_events(namespace: str, last_minutes: int = 60) -> str:
         if not recent_events:
             return f"No events in the last {last_minutes} minutes for namespace {namespace}"
         
-        # Sort by time
-        recent_events.sort(key=lambda e: e.last_timestamp or datetime.min, reverse=True)
+        # Newest 20 only
+        recent_events = heapq.nlargest(20, recent_events, key=lambda e: e.last_timestamp or datetime.min)
         
         summary = [f"Recent Events (last {last_minutes}min) for {namespace}:"]
         
-        for event in recent_events[:20]:  # Limit to 20
+        for event in recent_events:
             time_str = event.last_timestamp.strftime("%H:%M:%S") if event.last_timestamp else "Unknown"
             obj_ref = f"{event.involved_object.kind}/{event.involved_object.name}" if event.involved_object else "Unknown"
             summary.append(f"  [{time_str}] {event.type} - {event.reason}: {event.message} ({obj_ref})")
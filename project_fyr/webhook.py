@@ -3,15 +3,17 @@ from typing import Optional, Iterator
 from datetime import datetime
 import logging
 
-from .config import settings
-from .db import init_db, AlertRepo
+import orjson
+
+from .config import get_settings
+from .db import get_engine, AlertRepo, AlertStateRecord
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 def get_alert_repo() -> Iterator[AlertRepo]:
-    engine = init_db(settings.database_url)
+    engine = get_engine(get_settings().database_url)
     yield AlertRepo(engine)
 
 from datetime import datetime, timedelta
@@ -25,11 +27,13 @@ async def receive_alert(
     repo: AlertRepo = Depends(get_alert_repo)
 ):
     # Auth check
-    if settings.alert_webhook_secret and x_alert_token != settings.alert_webhook_secret:
+    secret = get_settings().alert_webhook_secret
+    if secret and x_alert_token != secret:
         raise HTTPException(status_code=401, detail="Invalid alert token")
 
     try:
-        payload = await request.json()
+        # orjson straight from the raw body; Alertmanager payloads can be large
+        payload = orjson.loads(await request.body())
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid JSON")
 
@@ -44,7 +48,11 @@ async def receive_alert(
     saved_count = 0
     investigation_triggered_count = 0
     skipped_count = 0
-    
+    records = []
+    state_updates = []
+    # States decided earlier in this payload, so repeated fingerprints see them
+    pending_states: dict[str, AlertStateRecord] = {}
+
     for item in alerts:
         # Extract fields
         status = item.get("status", "firing")
@@ -74,7 +82,7 @@ async def receive_alert(
         should_investigate = False
         
         # Get current state
-        state = repo.get_state(fingerprint)
+        state = pending_states.get(fingerprint) or repo.get_state(fingerprint)
         
         # Sticky Throttling: Check if we investigated recently, regardless of status.
         is_throttled = False
@@ -101,63 +109,43 @@ async def receive_alert(
             should_investigate = False
             logger.info(f"Alert {fingerprint} resolved")
 
-        # Create the alert record
-        # If throttled or resolved, we mark it as 'batched=True' immediately (conceptually 'handled' or 'skipped')
-        # so the batcher doesn't pick it up.
-        # Ideally we'd have a separate status like 'batched' vs 'skipped', but 'batched=True' effectively hides it from batcher.
-        # We can use batch_id=-1 to indicate skipping if needed, but simple boolean is enough to hide it.
+        # Throttled or resolved alerts are stored as already batched (conceptually
+        # 'handled' or 'skipped') so the batcher doesn't pick them up.
+        records.append({
+            "fingerprint": fingerprint,
+            "status": status,
+            "starts_at": starts_at,
+            "ends_at": ends_at,
+            "labels": labels,
+            "annotations": annotations,
+            "payload": item,
+            "batched": not should_investigate,
+        })
         
-        alert_record = repo.create_alert(
-            fingerprint=fingerprint,
-            status=status,
-            starts_at=starts_at,
-            ends_at=ends_at,
-            labels=labels,
-            annotations=annotations,
-            payload=item
-        )
-        
-        if not should_investigate:
-            # Mark as processed/skipped to avoid batcher pickup
-            # We can do this by updating 'batched' to True immediately (or 1 in sqlite)
-            # We need to do this manually since create_alert doesn't support it yet
-            # Or we could modify repo.create_alert to accept kwargs for batched.
-            # For now, let's update it.
-            # Optimization: could add 'batched' to create_alert arguments.
-            # But adhering to minimum changes, let's do a quick update or rely on `batched` default being 0.
-            # Wait, `create_alert` returns the record. We can set it?
-            # No, `create_alert` commits. Use a simple update in repo? 
-            # Actually, let's just use SQL.
-            pass # See below, we need to modify logic to set batched=True if skipped.
-            
-            # Since create_alert commits, we might want to update it.
-            # But cleaner is to update `repo.create_alert` to accept `batched` param?
-            # Or just hack it:
-            from sqlalchemy import text
-            with repo.session() as s:
-                s.execute(
-                    text("UPDATE alerts SET batched = 1 WHERE id = :id"),
-                    {"id": alert_record.id}
-                )
-                s.commit()
-            # NOTE: raw SQL is a bit risky if we change DBs, but this is SQLite.
-            # Better to add `repo.mark_as_processed(alert_record.id)` or similar.
-            # Let's rely on standard practice: update the state, then handle the record.
-            
-            skipped_count += 1
-            
-        else:
+        if should_investigate:
             investigation_triggered_count += 1
+        else:
+            skipped_count += 1
             
-        # Update State
-        repo.update_state(
+        # Update State (written together with the alerts below)
+        state_updates.append({
+            "fingerprint": fingerprint,
+            "status": status,
+            "now": now,
+            "investigated": should_investigate,
+        })
+        pending_states[fingerprint] = AlertStateRecord(
             fingerprint=fingerprint,
             status=status,
-            now=now,
-            investigated=should_investigate
+            last_received_at=now,
+            last_investigated_at=now if should_investigate else (state.last_investigated_at if state else None),
         )
 
         saved_count += 1
 
+    # One multi-row INSERT for the whole payload, committed with the state
+    # updates so a failed insert cannot leave alerts marked as investigated
+    repo.record_alerts(records, state_updates)
+
     logger.info(f"Webhook processed {len(alerts)} alerts: {investigation_triggered_count} triggered, {skipped_count} skipped/throttled.")
     return {"status": "accepted", "count": saved_count, "triggered": investigation_triggered_count}
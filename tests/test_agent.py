@@ -1,8 +1,22 @@
 from unittest.mock import MagicMock, patch
-from project_fyr.agent import InvestigatorAgent
 
-@patch("project_fyr.agent.ChatOpenAI")
-@patch("project_fyr.agent.create_agent")
+import pytest
+from langchain_core.messages import AIMessage
+
+from project_fyr.agent import InvestigatorAgent, _build_agent, _build_llm
+
+
+@pytest.fixture(autouse=True)
+def clear_agent_cache():
+    _build_agent.cache_clear()
+    _build_llm.cache_clear()
+    yield
+    _build_agent.cache_clear()
+    _build_llm.cache_clear()
+
+
+@patch("langchain_openai.ChatOpenAI")
+@patch("langchain.agents.create_agent")
 def test_investigate(mock_create_agent, mock_chat):
     # Mock the agent that create_agent returns
     mock_agent = MagicMock()
@@ -11,9 +25,7 @@ def test_investigate(mock_create_agent, mock_chat):
     mock_create_agent.return_value = mock_agent
     
     # Mock the invoke response with messages format
-    mock_message = MagicMock()
-    mock_message.content = "Root cause: Misconfiguration"
-    mock_message.type = "ai"
+    mock_message = AIMessage(content="Root cause: Misconfiguration")
     mock_agent_with_config.invoke.return_value = {"messages": [mock_message]}
     
     agent = InvestigatorAgent(api_key="fake")
@@ -32,3 +44,110 @@ def test_investigate_mock():
     agent = InvestigatorAgent(model_name="mock")
     analysis = agent.investigate("dep", "ns")
     assert "[MOCK AGENT]" in analysis.summary
+
+@patch("langchain_openai.ChatOpenAI")
+@patch("langchain.agents.create_agent")
+def test_investigate_many(mock_create_agent, mock_chat):
+    mock_agent = MagicMock()
+    mock_agent_with_config = MagicMock()
+    mock_agent.with_config.return_value = mock_agent_with_config
+    mock_create_agent.return_value = mock_agent
+
+    async def stream(inputs, version):
+        content = inputs["messages"][0]["content"]
+        if "dep2" in content:
+            raise RuntimeError("boom")
+        yield {"event": "on_tool_end", "name": "k8s_events", "parent_ids": ["root"], "data": {}}
+        yield {
+            "event": "on_chain_end",
+            "name": "LangGraph",
+            "parent_ids": [],
+            "data": {"output": {"messages": [AIMessage(content="Root cause: Bad image")]}},
+        }
+
+    mock_agent_with_config.astream_events.side_effect = stream
+
+    agent = InvestigatorAgent(api_key="fake")
+    analyses = agent.investigate_many([("dep1", "ns"), ("dep2", "ns")], max_concurrency=2)
+
+    assert len(analyses) == 2
+    assert analyses[0].summary == "Agent Investigation for dep1"
+    assert analyses[0].likely_cause == "Root cause: Bad image"
+    assert analyses[1].severity == "high"
+
+@patch("langchain_openai.ChatOpenAI")
+@patch("langchain.agents.create_agent")
+def test_agent_graph_is_reused(mock_create_agent, mock_chat):
+    InvestigatorAgent(api_key="fake")
+    InvestigatorAgent(api_key="fake")
+    InvestigatorAgent(api_key="other")
+
+    assert mock_create_agent.call_count == 2
+    assert mock_chat.call_count == 2
+
+@patch("langchain_openai.ChatOpenAI")
+@patch("langchain.agents.create_agent")
+def test_investigate_truncated(mock_create_agent, mock_chat):
+    from langgraph.errors import GraphRecursionError
+
+    mock_agent = MagicMock()
+    mock_create_agent.return_value = mock_agent
+    mock_agent.with_config.return_value.invoke.side_effect = GraphRecursionError("limit")
+
+    analysis = InvestigatorAgent(api_key="fake").investigate("dep", "ns")
+
+    assert "truncated" in analysis.summary
+    mock_agent.with_config.assert_called_with({"recursion_limit": 30})
+
+def test_investigate_fast_path_skips_agent():
+    agent = InvestigatorAgent(api_key=None)
+    analysis = agent.investigate("dep", "ns", alert_context={
+        "summary": "1 alert",
+        "alerts": [
+            {"name": "HighLatency", "severity": "warning", "description": "p99 > 1s"},
+            {"name": "OOMKilled", "severity": "critical", "description": "api container OOMKilled"},
+        ],
+    })
+    assert analysis.summary == "OOMKilled: api container OOMKilled"
+    assert "memory limit" in analysis.likely_cause
+    assert analysis.severity == "critical"
+
+@patch("langchain_openai.ChatOpenAI")
+@patch("langchain.agents.create_agent")
+def test_investigate_reuses_cached_alert_analysis(mock_create_agent, mock_chat):
+    from project_fyr.agent import _analysis_cache
+
+    _analysis_cache.cache_clear()
+    mock_agent_with_config = mock_create_agent.return_value.with_config.return_value
+    mock_agent_with_config.invoke.return_value = {"messages": [AIMessage(content="Root cause: Disk full")]}
+    alert_context = {"summary": "1 alert", "alerts": [{"name": "DiskFull", "description": "pvc 99%"}]}
+
+    agent = InvestigatorAgent(api_key="fake")
+    first = agent.investigate("dep", "ns", alert_context=alert_context)
+    second = agent.investigate("dep", "ns", alert_context=alert_context)
+
+    assert first == second
+    mock_agent_with_config.invoke.assert_called_once()
+    _analysis_cache.cache_clear()
+
+def test_async_http_client_is_closed_on_its_own_loop():
+    import asyncio
+    import threading
+    from project_fyr.agent import _close_async_http_client
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    closed_on = []
+
+    async def aclose():
+        closed_on.append(asyncio.get_running_loop())
+
+    with patch("project_fyr.agent.get_async_http_client") as get_client:
+        get_client.return_value.aclose = aclose
+        _close_async_http_client(loop)
+
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+    assert closed_on == [loop]
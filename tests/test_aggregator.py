@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from project_fyr.aggregator import (
+    _bucket_failures,
+    _fit_to_budget,
+    _format_bucket,
+)
+
+
+def _failure(deployment, failed_at, cause="OOMKilled"):
+    rollout = SimpleNamespace(
+        namespace="ns", deployment=deployment, failed_at=failed_at, started_at=failed_at
+    )
+    analysis = SimpleNamespace(analysis={"summary": "s", "likely_cause": cause})
+    return rollout, analysis
+
+
+def test_fit_to_budget_drops_tail():
+    items = ["a" * 40, "b" * 40, "c" * 40]
+    text = _fit_to_budget(items, lambda i, item: f"{item}\n", 25, lambda t: len(t) // 4)
+    assert "a" * 40 in text
+    assert "b" * 40 in text
+    assert "c" * 40 not in text
+    assert text.endswith("... and 1 more similar failures\n")
+
+
+def test_fit_to_budget_keeps_first_item_even_if_oversized():
+    text = _fit_to_budget(["x" * 400], lambda i, item: item, 1, len)
+    assert text == "x" * 400
+
+
+def test_bucket_failures_groups_normalized_causes():
+    now = datetime.utcnow()
+    failures = [
+        _failure("old", now - timedelta(hours=3), cause="OOMKilled  by kernel"),
+        _failure("new", now, cause="oomkilled by\nkernel"),
+        _failure("other", now - timedelta(hours=1), cause="ImagePullBackOff"),
+    ]
+    buckets = _bucket_failures(failures)
+
+    assert [b["count"] for b in buckets] == [2, 1]
+    assert buckets[0]["example"].deployment == "new"
+    text = _format_bucket(1, buckets[0])
+    assert text.startswith("Pattern #1 (count=2):\nNamespaces: ns\nExample Deployment: ns/new\n")
+
+
+def test_bucket_failures_without_analysis():
+    rollout = SimpleNamespace(namespace="ns", deployment="d", failed_at=None, started_at=None)
+    buckets = _bucket_failures([(rollout, None)])
+    assert "Analysis: Pending or failed" in _format_bucket(1, buckets[0])
@@ -43,3 +43,40 @@ def test_detail_not_found(repo):
     app.dependency_overrides[get_repo] = lambda: repo
     response = client.get("/rollout/999")
     assert response.status_code == 404
+
+def test_get_with_analysis(repo):
+    from project_fyr.models import Analysis, ReducedContext
+
+    r = repo.create(
+        cluster="test-cluster",
+        namespace="default",
+        deployment="test-dep-joined",
+        generation=1,
+        status=RolloutStatus.FAILED
+    )
+    assert repo.get_with_analysis(r.id)[1] is None
+
+    repo.append_analysis(
+        r.id,
+        reduced_context=ReducedContext(
+            namespace="default", deployment="test-dep-joined", generation=1, summary="s",
+            phase="FAILED", failing_pods=[], log_clusters=[], events=[],
+        ),
+        analysis=Analysis(summary="Bad image", likely_cause="typo", recommended_steps=[], severity="high"),
+        model_name="test",
+    )
+    rollout, record = repo.get_with_analysis(r.id)
+
+    assert rollout.deployment == "test-dep-joined"
+    assert record.analysis["summary"] == "Bad image"
+    assert isinstance(record.analysis["created_at"], str)
+    assert repo.get_with_analysis(999) == (None, None)
+
+def test_rollout_analysis_must_be_loaded_explicitly(repo):
+    import pytest
+    from sqlalchemy.exc import InvalidRequestError
+
+    r = repo.create(cluster="c", namespace="ns", deployment="lazy", generation=1)
+
+    with pytest.raises(InvalidRequestError):
+        repo.get_by_id(r.id).analysis
@@ -1,12 +1,13 @@
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
-from project_fyr.dashboard import app
+from project_fyr.dashboard import app, _k8s_clients, _investigate_context_cache
 
 client = TestClient(app)
 
-@patch("project_fyr.dashboard.settings")
+@patch("project_fyr.dashboard.get_settings")
 @patch("project_fyr.agent.InvestigatorAgent")
-def test_investigate_api(mock_agent_cls, mock_settings):
+def test_investigate_api(mock_agent_cls, mock_get_settings):
+    mock_settings = mock_get_settings.return_value
     mock_settings.langchain_model_name = "mock-model"
     mock_settings.openai_api_key = "mock-key"
     
@@ -37,6 +38,8 @@ def test_investigate_api_missing_params():
 @patch("kubernetes.client.AppsV1Api")
 @patch("kubernetes.client.CoreV1Api")
 def test_investigate_page(mock_core, mock_apps, mock_config):
+    _k8s_clients.cache_clear()
+    _investigate_context_cache.clear()
     mock_core_instance = MagicMock()
     mock_core.return_value = mock_core_instance
     
@@ -49,12 +52,20 @@ def test_investigate_page(mock_core, mock_apps, mock_config):
     
     mock_dep = MagicMock()
     mock_dep.metadata.name = "nginx"
+    mock_dep.metadata.namespace = "default"
     # Fix: Set numeric values for replicas to avoid MagicMock comparison
     mock_dep.status.ready_replicas = 3
     mock_dep.spec.replicas = 3
-    mock_apps_instance.list_namespaced_deployment.return_value.items = [mock_dep]
+    mock_apps_instance.list_deployment_for_all_namespaces.return_value.items = [mock_dep]
     
     response = client.get("/investigate")
     assert response.status_code == 200
     assert "On-Demand Investigation" in response.text
     assert "nginx" in response.text
+    mock_apps_instance.list_namespaced_deployment.assert_not_called()
+
+    # A second render within the TTL is served from the cached snapshot
+    client.get("/investigate")
+    mock_apps_instance.list_deployment_for_all_namespaces.assert_called_once()
+    _k8s_clients.cache_clear()
+    _investigate_context_cache.clear()
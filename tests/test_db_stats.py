@@ -60,3 +60,161 @@ def test_get_recent_failures(repo, session):
     assert len(failures) == 1
     assert failures[0][0].id == r1.id
     assert failures[0][1].analysis["summary"] == "test failure"
+
+def test_init_db_sqlite_file_uses_wal(tmp_path):
+    from project_fyr.db import init_db
+
+    engine = init_db(f"sqlite:///{tmp_path / 'fyr.db'}")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+    engine.dispose()
+
+def test_init_db_round_trips_json_columns():
+    from project_fyr.db import RolloutRepo, init_db
+
+    repo = RolloutRepo(init_db("sqlite:///:memory:"))
+    r = repo.create(cluster="c1", namespace="n1", deployment="d1", generation=1,
+                    status=RolloutStatus.PENDING, metadata_json={"team": "a", "replicas": [1, 2]})
+
+    assert repo.get_by_id(r.id).metadata_json == {"team": "a", "replicas": [1, 2]}
+
+def test_timestamps_default_to_database_utc_time():
+    from project_fyr.db import init_db, AlertRepo
+
+    repo = AlertRepo(init_db("sqlite:///:memory:"))
+    before = datetime.utcnow().replace(microsecond=0)
+    repo.create_alerts_bulk([{
+        "fingerprint": "fp", "status": "firing", "starts_at": before,
+        "labels": {}, "annotations": {}, "payload": {},
+    }])
+
+    (alert,) = repo.get_unbatched_alerts(before - timedelta(minutes=1))
+    assert before <= alert.received_at <= datetime.utcnow()
+
+def test_timestamps_are_filled_in_on_tables_without_server_defaults():
+    from sqlalchemy import MetaData
+    from project_fyr.db import AlertRecord, AlertRepo, init_db
+
+    # Tables created before the server defaults existed: create_all never adds them
+    engine = init_db("sqlite:///:memory:")
+    AlertRecord.__table__.drop(engine)
+    legacy = AlertRecord.__table__.to_metadata(MetaData())
+    legacy.c.received_at.server_default = None
+    legacy.create(engine)
+    repo = AlertRepo(engine)
+    now = datetime.utcnow()
+
+    repo.create_alerts_bulk([{
+        "fingerprint": "fp", "status": "firing", "starts_at": now,
+        "labels": {}, "annotations": {}, "payload": {},
+    }])
+
+    (alert,) = repo.get_unbatched_alerts(now - timedelta(minutes=1))
+    assert alert.received_at >= now
+
+def test_repos_share_one_session_factory_per_engine():
+    from project_fyr.db import AlertRepo, RolloutRepo, init_db
+
+    engine = init_db("sqlite:///:memory:")
+
+    assert RolloutRepo(engine)._sessions is AlertRepo(engine)._sessions
+    assert RolloutRepo(engine)._sessions.kw["expire_on_commit"] is False
+
+def test_count_investigations_in_window(engine, repo):
+    from project_fyr.db import NamespaceIncidentRepo
+    from project_fyr.models import NamespaceIncidentType
+
+    incidents = NamespaceIncidentRepo(engine)
+    now = datetime.utcnow()
+    repo.create(cluster="c1", namespace="n1", deployment="d1", generation=1, started_at=now)
+    repo.create(cluster="c1", namespace="n2", deployment="d2", generation=1, started_at=now)
+    repo.create(cluster="c1", namespace="n1", deployment="d3", generation=1, started_at=now - timedelta(hours=2))
+    incidents.create(cluster="c1", namespace="n1", incident_type=NamespaceIncidentType.HIGH_RESTART_RATE)
+
+    assert incidents.count_investigations_in_window("c1", "n1", hours=1) == 2
+    assert incidents.count_investigations_in_window("c1", hours=1) == 3
+    assert incidents.count_investigations_in_window("c2", hours=1) == 0
+
+def test_namespace_incident_reads_can_share_a_session(engine):
+    from project_fyr.db import NamespaceIncidentRepo
+    from project_fyr.models import NamespaceIncidentType
+
+    incidents = NamespaceIncidentRepo(engine)
+    incident = incidents.create(cluster="c1", namespace="n1", incident_type=NamespaceIncidentType.QUOTA_EXCEEDED)
+
+    with incidents.session() as s:
+        first = incidents.get_by_id(incident.id, session=s)
+        active = incidents.get_active_incident("c1", "n1", "quota_exceeded", session=s)
+        assert first is active
+        assert first in s
+        assert incidents.count_investigations_in_window("c1", session=s) == 1
+
+def test_namespace_incident_append_analysis_links_record(engine):
+    from project_fyr.db import NamespaceIncidentRepo, RolloutRepo
+    from project_fyr.models import Analysis, NamespaceIncidentType
+
+    incidents = NamespaceIncidentRepo(engine)
+    incident = incidents.create(cluster="c1", namespace="n1", incident_type=NamespaceIncidentType.QUOTA_EXCEEDED)
+    incidents.append_analysis(
+        incident.id,
+        reduced_context={"namespace": "n1"},
+        analysis=Analysis(summary="Quota", likely_cause="limits", recommended_steps=[]),
+        model_name="test",
+    )
+
+    stored = incidents.get_by_id(incident.id)
+    assert stored.analysis_status == AnalysisStatus.DONE
+    assert RolloutRepo(engine).get_analysis(stored.analysis_id).analysis["summary"] == "Quota"
+
+def test_append_analysis_stores_completed_at_as_naive_utc(repo):
+    from datetime import timezone
+    from project_fyr.models import Analysis, ReducedContext
+
+    r = repo.create(cluster="c1", namespace="n1", deployment="d1", generation=1)
+    created = datetime(2026, 1, 1, 12, 0, tzinfo=timezone(timedelta(hours=2)))
+    repo.append_analysis(
+        r.id,
+        reduced_context=ReducedContext.model_construct(namespace="n1", deployment="d1", generation=1),
+        analysis=Analysis(summary="s", likely_cause="c", recommended_steps=[], created_at=created),
+        model_name="test",
+    )
+
+    assert repo.get_by_id(r.id).completed_at == datetime(2026, 1, 1, 10, 0)
+
+def test_engine_options_batch_psycopg2_executemany():
+    from project_fyr.db import _engine_options
+
+    assert _engine_options("postgresql+psycopg2://u@h/db")["executemany_mode"] == "values_plus_batch"
+    assert "executemany_mode" not in _engine_options("mysql+pymysql://u@h/db")
+
+def test_namespace_incident_enums_are_stored_as_names(engine):
+    from sqlalchemy import text
+    from project_fyr.db import NamespaceIncidentRepo
+    from project_fyr.models import NamespaceIncidentStatus, NamespaceIncidentType
+
+    incidents = NamespaceIncidentRepo(engine)
+    incident = incidents.create(cluster="c1", namespace="n1", incident_type=NamespaceIncidentType.TERMINATING_STUCK)
+
+    stored = incidents.get_by_id(incident.id)
+    assert stored.incident_type is NamespaceIncidentType.TERMINATING_STUCK
+    assert stored.status == NamespaceIncidentStatus.ACTIVE
+    assert incidents.get_active_incident("c1", "n1", "terminating_stuck").id == incident.id
+    with engine.connect() as conn:
+        raw = conn.execute(text("SELECT incident_type, status FROM namespace_incidents WHERE id = :id"), {"id": incident.id}).one()
+    assert tuple(raw) == ("TERMINATING_STUCK", "ACTIVE")
+
+def test_namespace_incidents_written_by_sa_enum_are_still_found(engine):
+    from sqlalchemy import text
+    from project_fyr.db import NamespaceIncidentRepo
+    from project_fyr.models import NamespaceIncidentType
+
+    # Rows as the former SAEnum columns wrote them: member names
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO namespace_incidents (cluster, namespace, incident_type, status, analysis_status, notify_status) "
+            "VALUES ('c1', 'legacy', 'QUOTA_EXCEEDED', 'ACTIVE', 'PENDING', 'PENDING')"
+        ))
+    incidents = NamespaceIncidentRepo(engine)
+
+    assert incidents.get_active_incident("c1", "legacy", NamespaceIncidentType.QUOTA_EXCEEDED) is not None
+    assert [i.namespace for i in incidents.list_active("c1")] == ["legacy"]
@@ -1,4 +1,9 @@
 from datetime import datetime
+import pytest
+from sqlalchemy import MetaData, create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import StaticPool
+from project_fyr.db import Rollout, RolloutRepo
 from project_fyr.models import RolloutStatus
 from project_fyr.service import evaluate_deployment_phase, analyze_pod_failures, should_fail_early, PodFailureSignals
 from unittest.mock import MagicMock
@@ -91,14 +96,13 @@ def test_handle_deployment_event_with_watch_all_namespaces():
     dep.spec.replicas = 1
     
     repo = MagicMock()
-    repo.get_by_key.return_value = None
     
     config = Settings(watch_all_namespaces=True)
     
     # Should create rollout even without labels
     handle_deployment_event(dep, "ADDED", repo, "test-cluster", namespace_metadata={}, config=config)
     
-    repo.create.assert_called_once()
+    repo.upsert.assert_called_once()
 
 
 def test_handle_deployment_event_with_namespace_annotation():
@@ -118,7 +122,6 @@ def test_handle_deployment_event_with_namespace_annotation():
     dep.spec.replicas = 1
     
     repo = MagicMock()
-    repo.get_by_key.return_value = None
     
     # Namespace has the annotation
     ns_meta = {
@@ -132,7 +135,7 @@ def test_handle_deployment_event_with_namespace_annotation():
     # Should create rollout because namespace has annotation
     handle_deployment_event(dep, "ADDED", repo, "test-cluster", namespace_metadata=ns_meta, config=config)
     
-    repo.create.assert_called_once()
+    repo.upsert.assert_called_once()
 
 
 def test_handle_deployment_event_requires_opt_in():
@@ -157,8 +160,7 @@ def test_handle_deployment_event_requires_opt_in():
     # Should NOT create rollout
     handle_deployment_event(dep, "ADDED", repo, "test-cluster", namespace_metadata=ns_meta, config=config)
     
-    repo.create.assert_not_called()
-    repo.get_by_key.assert_not_called()
+    repo.upsert.assert_not_called()
 
 
 def test_handle_deployment_event_with_deployment_label():
@@ -178,12 +180,111 @@ def test_handle_deployment_event_with_deployment_label():
     dep.spec.replicas = 1
     
     repo = MagicMock()
-    repo.get_by_key.return_value = None
     
     config = Settings(namespace_label_enabled=False, watch_all_namespaces=False)
     
     # Should create rollout because deployment has label
     handle_deployment_event(dep, "ADDED", repo, "test-cluster", namespace_metadata={}, config=config)
     
-    repo.create.assert_called_once()
+    repo.upsert.assert_called_once()
 
+
+def test_rollout_upsert_inserts_then_updates_metadata(repo):
+    key = dict(cluster="c1", namespace="ns", deployment="app", generation=3)
+
+    repo.upsert(**key, metadata_json={"team": "a"}, status=RolloutStatus.ROLLING_OUT, origin="k8s")
+    repo.upsert(**key, team="payments", status=RolloutStatus.PENDING, origin="k8s")
+    repo.upsert(**key, status=RolloutStatus.PENDING, origin="k8s")
+
+    rollout = repo.get_by_key(**key)
+    assert rollout.status == RolloutStatus.ROLLING_OUT
+    assert rollout.metadata_json == {"team": "a"}
+    assert rollout.team == "payments"
+    assert len(repo.list_active("c1")) == 1
+
+
+def test_rollout_upsert_without_unique_key_falls_back(caplog):
+    # Tables created before uq_rollout_key existed: create_all never adds it
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    legacy = Rollout.__table__.to_metadata(MetaData())
+    legacy.constraints -= {c for c in legacy.constraints if c.name == "uq_rollout_key"}
+    legacy.create(engine)
+    repo = RolloutRepo(engine)
+    key = dict(cluster="c1", namespace="ns", deployment="app", generation=1)
+
+    repo.upsert(**key, status=RolloutStatus.ROLLING_OUT, origin="k8s")
+    repo.upsert(**key, team="payments", status=RolloutStatus.PENDING, origin="k8s")
+
+    assert repo.get_by_key(**key).team == "payments"
+    assert len(repo.list_active("c1")) == 1
+    assert "uq_rollout_key" in caplog.text
+
+
+def test_rollout_metadata_updates_are_merged(repo):
+    key = dict(cluster="c1", namespace="ns", deployment="app", generation=4)
+
+    repo.upsert(**key, metadata_json={"team": "a", "tier": "web"})
+    repo.upsert(**key, metadata_json={"team": "b"})
+    rollout = repo.get_by_key(**key)
+    repo.update_metadata(rollout.id, metadata_json={"owner": "ops"})
+
+    assert repo.get_by_id(rollout.id).metadata_json == {"team": "b", "tier": "web", "owner": "ops"}
+
+
+def test_rollout_statuses_are_stored_as_checked_strings(repo):
+    r = repo.create(cluster="c1", namespace="ns", deployment="app", generation=5, status=RolloutStatus.FAILED)
+    loaded = repo.get_by_id(r.id)
+    assert type(loaded.status) is str
+    assert loaded.status == RolloutStatus.FAILED
+    assert loaded.analysis_status == "PENDING"
+
+    with pytest.raises(IntegrityError):
+        repo.create(cluster="c1", namespace="ns", deployment="app", generation=6, status="BOGUS")
+
+
+def test_stabilized_failed_rollout_skips_analysis_and_stays_failed(repo):
+    from project_fyr.config import Settings
+    from project_fyr.service import handle_deployment_event
+
+    r = repo.create(cluster="c1", namespace="ns", deployment="app", generation=2, status=RolloutStatus.FAILED)
+    dep = MagicMock()
+    dep.metadata.namespace = "ns"
+    dep.metadata.name = "app"
+    dep.metadata.generation = 2
+    dep.metadata.labels = {"project-fyr/enabled": "true"}
+    dep.status.available_replicas = 3
+    dep.spec.replicas = 3
+    dep.status.conditions = []
+
+    handle_deployment_event(dep, "MODIFIED", repo, "c1", namespace_metadata={}, config=Settings())
+
+    rollout = repo.get_by_id(r.id)
+    assert rollout.status == RolloutStatus.FAILED
+    assert rollout.analysis_status == "DONE"
+    assert rollout.analysis_id is None
+    assert rollout.metadata_json["analysis_skipped"] == "stabilized, LLM skipped"
+    assert repo.list_failed("c1") == []
+
+
+def test_analysis_worker_records_placeholder_context_for_failed_rollout(engine, repo):
+    from unittest.mock import patch
+    from project_fyr.config import Settings
+    from project_fyr.db import AlertRepo
+    from project_fyr.models import Analysis
+    from project_fyr.service import AnalysisWorker
+
+    r = repo.create(cluster="c1", namespace="ns", deployment="app", generation=3, status=RolloutStatus.FAILED)
+
+    with patch("project_fyr.service.InvestigatorAgent") as agent_cls, patch("project_fyr.service.SlackNotifier"):
+        agent_cls.return_value.investigate_many.return_value = [
+            Analysis(summary="s", likely_cause="c", recommended_steps=[])
+        ]
+        worker = AnalysisWorker(repo, AlertRepo(engine), "c1", Settings())
+        worker.run_once()
+
+    with repo.session() as s:
+        rollout, record = repo.get_with_analysis(r.id, session=s)
+        assert rollout.analysis_status == "DONE"
+        assert record.reduced_context["summary"] == "Agentic Investigation"
+        assert record.reduced_context["deployment"] == "app"
+        assert record.reduced_context["generation"] == 3
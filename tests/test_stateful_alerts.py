@@ -106,3 +106,185 @@ def test_stateful_alert_flow():
     assert data["triggered"] == 0  # Throttled due to sticky throttling
 
 
+
+def test_list_batches_newest_first():
+    repo = AlertRepo(engine)
+    now = datetime.utcnow()
+    for i, created in enumerate([now - timedelta(hours=1), now]):
+        repo.create_batch(
+            [], f"batch {i}",
+            primary_fingerprint=f"fp-list-{i}", namespace="ns", service="svc",
+            window_start=created, window_end=created, created_at=created,
+        )
+
+    batches = repo.list_batches(limit=2)
+
+    assert [b.context_summary for b in batches] == ["batch 1", "batch 0"]
+
+def test_create_batch_marks_alerts_and_queues_job():
+    from project_fyr.db import AlertRecord, InvestigationJob
+
+    repo = AlertRepo(engine)
+    now = datetime.utcnow()
+    alerts = [
+        repo.create_alert(
+            fingerprint=f"fp-batch-{i}", status="firing", starts_at=now,
+            labels={}, annotations={}, payload={},
+        )
+        for i in range(3)
+    ]
+
+    batch_id = repo.create_batch(
+        alerts, "3 alerts",
+        primary_fingerprint="fp-batch-0", namespace="ns", service="svc",
+        window_start=now, window_end=now,
+    )
+
+    with Session(engine) as s:
+        rows = s.query(AlertRecord).filter(AlertRecord.id.in_([a.id for a in alerts])).all()
+        assert all(r.batched and r.batch_id == batch_id for r in rows)
+        job = s.query(InvestigationJob).filter_by(alert_batch_id=batch_id).one()
+        assert job.status == "pending"
+
+    # Returned objects stay loaded after commit, server defaults included
+    assert repo.get_batch(batch_id).created_at is not None
+    assert all(a.received_at is not None and a.batched is False for a in alerts)
+
+def test_repo_reads_can_share_a_session():
+    repo = AlertRepo(engine)
+    now = datetime.utcnow()
+    batch_id = repo.create_batch(
+        [], "shared",
+        primary_fingerprint="fp-shared", namespace="ns", service="svc",
+        window_start=now, window_end=now,
+    )
+
+    with repo.session() as s:
+        first = repo.get_batch(batch_id, session=s)
+        second = repo.get_batch(batch_id, session=s)
+        assert first is second
+        assert first in s
+
+def test_alert_batcher_groups_unbatched_alerts():
+    from project_fyr.config import Settings
+    from project_fyr.db import AlertBatchRecord
+    from project_fyr.service import AlertBatcher
+
+    repo = AlertRepo(engine)
+    now = datetime.utcnow()
+    for name in ("HighLatency", "HighErrorRate"):
+        repo.create_alert(
+            fingerprint=f"fp-{name}", status="firing", starts_at=now,
+            labels={"alertname": name, "namespace": "batcher-ns", "service": "api"},
+            annotations={}, payload={},
+        )
+
+    AlertBatcher(repo, Settings()).run_once()
+
+    with Session(engine) as s:
+        batch = s.query(AlertBatchRecord).filter_by(namespace="batcher-ns").one()
+        assert batch.service == "api"
+        assert "Batch of 2 alerts" in batch.context_summary
+
+def test_webhook_stores_all_alerts_in_payload():
+    from project_fyr.db import AlertRecord
+
+    starts_at = datetime.utcnow().isoformat() + "Z"
+    payload = {
+        "alerts": [
+            {"status": "firing", "labels": {"alertname": "Bulk"}, "fingerprint": "fp-bulk-1", "startsAt": starts_at},
+            {"status": "resolved", "labels": {"alertname": "Bulk"}, "fingerprint": "fp-bulk-2", "startsAt": starts_at},
+        ]
+    }
+
+    resp = client.post("/webhook/alert", json=payload)
+    assert resp.json()["count"] == 2
+
+    with Session(engine) as s:
+        rows = {r.fingerprint: r for r in s.query(AlertRecord).filter(AlertRecord.fingerprint.like("fp-bulk-%"))}
+        assert not rows["fp-bulk-1"].batched
+        assert rows["fp-bulk-2"].batched
+
+def test_webhook_throttles_repeated_fingerprint_within_payload():
+    starts_at = datetime.utcnow().isoformat() + "Z"
+    alert = {"status": "firing", "labels": {"alertname": "Dup"}, "fingerprint": "fp-dup", "startsAt": starts_at}
+
+    resp = client.post("/webhook/alert", json={"alerts": [alert, alert]})
+    assert resp.json() == {"status": "accepted", "count": 2, "triggered": 1}
+
+
+def test_webhook_writes_alerts_and_state_in_one_transaction():
+    from unittest.mock import patch
+    from project_fyr.db import AlertRecord
+
+    payload = {"alerts": [{"status": "firing", "labels": {"alertname": "Lost"}, "fingerprint": "fp-lost"}]}
+    failing = TestClient(app, raise_server_exceptions=False)
+    with patch.object(AlertRepo, "_upsert_state", side_effect=RuntimeError("boom")):
+        resp = failing.post("/webhook/alert", json=payload)
+    assert resp.status_code == 500
+
+    with Session(engine) as s:
+        assert s.query(AlertRecord).filter_by(fingerprint="fp-lost").count() == 0
+        assert s.get(AlertStateRecord, "fp-lost") is None
+
+
+def test_get_pending_jobs_is_fifo():
+    from project_fyr.db import init_db
+
+    repo = AlertRepo(init_db("sqlite:///:memory:"))
+    now = datetime.utcnow()
+    batch_ids = [
+        repo.create_batch(
+            [], f"fifo {i}",
+            primary_fingerprint=f"fp-fifo-{i}", namespace="ns", service="svc",
+            window_start=now, window_end=now,
+        )
+        for i in range(3)
+    ]
+
+    assert [j.alert_batch_id for j in repo.get_pending_jobs()] == batch_ids
+
+def test_get_all_pending_jobs_groups_by_type():
+    from project_fyr.db import init_db, InvestigationJob
+
+    repo = AlertRepo(init_db("sqlite:///:memory:"))
+    with repo.session() as s:
+        s.add_all([
+            InvestigationJob(type="alert", status="pending"),
+            InvestigationJob(type="namespace", status="pending"),
+            InvestigationJob(type="alert", status="done"),
+        ])
+        s.commit()
+
+    jobs = repo.get_all_pending_jobs()
+
+    assert {t: len(js) for t, js in jobs.items()} == {"alert": 1, "namespace": 1}
+
+def test_analysis_worker_runs_pending_alert_jobs():
+    from unittest.mock import patch
+    from project_fyr.config import Settings
+    from project_fyr.db import init_db, InvestigationJob, RolloutRepo
+    from project_fyr.models import Analysis
+    from project_fyr.service import AnalysisWorker
+
+    engine = init_db("sqlite:///:memory:")
+    repo = AlertRepo(engine)
+    now = datetime.utcnow()
+    repo.create_batch(
+        [], "worker", primary_fingerprint="fp-worker", namespace="ns", service="api",
+        window_start=now, window_end=now,
+    )
+    with repo.session() as s:
+        s.add(InvestigationJob(type="namespace", status="pending"))
+        s.commit()
+
+    with patch("project_fyr.service.InvestigatorAgent") as agent_cls, patch("project_fyr.service.SlackNotifier"):
+        agent_cls.return_value.investigate.return_value = Analysis(summary="s", likely_cause="c", recommended_steps=[])
+        worker = AnalysisWorker(RolloutRepo(engine), repo, "c1", Settings())
+        worker.run_once()
+
+    agent_cls.return_value.investigate.assert_called_once()
+    assert agent_cls.return_value.investigate.call_args.args[:2] == ("api", "ns")
+    with repo.session() as s:
+        statuses = {j.type: j.status for j in s.query(InvestigationJob)}
+    assert statuses == {"alert": "done", "namespace": "pending"}
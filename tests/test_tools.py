@@ -77,3 +77,6 @@ def test_k8s_events(mock_get_core):
     
     result = k8s_events.invoke({"namespace": "default", "involved_object_name": "test-pod"})
     assert "Failed to pull image" in result
+    mock_api.list_namespaced_event.assert_called_once_with(
+        "default", field_selector="involvedObject.name=test-pod"
+    )
@@ -1,5 +1,6 @@
 from unittest.mock import MagicMock, patch
-from project_fyr.tools import k8s_get_argocd_application, k8s_list_helm_releases
+from kubernetes.client.rest import ApiException
+from project_fyr.tools import k8s_batch, k8s_get_argocd_application, k8s_list_helm_releases
 
 @patch("project_fyr.tools._get_custom_objects_api")
 def test_k8s_get_argocd_application(mock_get_custom):
@@ -23,6 +24,21 @@ def test_k8s_get_argocd_application(mock_get_custom):
     assert "Sync Status: Synced" in result
     assert "SharedResourceWarning" in result
 
+@patch("project_fyr.tools._get_custom_objects_api")
+def test_k8s_get_argocd_application_caches_not_found(mock_get_custom):
+    from project_fyr.tools import _argocd_misses
+
+    mock_api = mock_get_custom.return_value
+    mock_api.get_namespaced_custom_object.side_effect = ApiException(status=404)
+
+    first = k8s_get_argocd_application.invoke({"name": "plain-app", "namespace": "argocd"})
+    second = k8s_get_argocd_application.invoke({"name": "plain-app", "namespace": "argocd"})
+
+    assert "not found" in first
+    assert second == first
+    mock_api.get_namespaced_custom_object.assert_called_once()
+    _argocd_misses.clear()
+
 @patch("project_fyr.tools._get_core_v1")
 def test_k8s_list_helm_releases(mock_get_core):
     mock_api = MagicMock()
@@ -54,3 +70,33 @@ def test_k8s_list_helm_releases_empty(mock_get_core):
     
     result = k8s_list_helm_releases.invoke({"namespace": "default"})
     assert "No Helm releases found" in result
+
+@patch("project_fyr.tools._get_core_v1")
+def test_k8s_batch(mock_get_core):
+    mock_api = MagicMock()
+    mock_get_core.return_value = mock_api
+    mock_cm = MagicMock()
+    mock_cm.data = {"key": "value"}
+    mock_api.read_namespaced_config_map.return_value = mock_cm
+
+    result = k8s_batch.invoke({"invocations": [
+        {"tool": "k8s_get_configmap", "args": {"name": "my-cm", "namespace": "default"}},
+        {"tool": "rm_rf", "args": {}},
+    ]})
+
+    assert '### k8s_get_configmap {"name": "my-cm", "namespace": "default"}' in result
+    assert "key: value" in result
+    assert "Error: Unknown tool 'rm_rf'" in result
+
+@patch("kubernetes.config.load_kube_config")
+def test_shared_api_client_retries_reads(mock_config):
+    from project_fyr.k8s_client import get_api_client
+
+    get_api_client.cache_clear()
+    try:
+        retries = get_api_client().configuration.retries
+        assert retries.total == 3
+        assert 503 in retries.status_forcelist
+        assert "POST" not in retries.allowed_methods
+    finally:
+        get_api_client.cache_clear()
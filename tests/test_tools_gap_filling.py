@@ -77,3 +77,20 @@ def test_k8s_get_endpoints(mock_get_core):
     
     result = k8s_get_endpoints.invoke({"service_name": "my-svc", "namespace": "default"})
     assert "Ready IPs (80/TCP): 10.1.1.1" in result
+
+@patch("project_fyr.tools._get_core_v1")
+def test_get_namespace_events_filters_by_age(mock_get_core):
+    from datetime import datetime, timedelta, timezone
+    from project_fyr.tools import get_namespace_events
+
+    now = datetime.now(timezone.utc)
+    recent = MagicMock(type="Warning", reason="BackOff", message="recent")
+    recent.last_timestamp = now - timedelta(minutes=5)
+    stale = MagicMock(type="Normal", reason="Pulled", message="stale")
+    stale.last_timestamp = now - timedelta(hours=3)
+    mock_get_core.return_value.list_namespaced_event.return_value.items = [stale, recent]
+
+    result = get_namespace_events.invoke({"namespace": "ns", "last_minutes": 60})
+
+    assert "recent" in result
+    assert "stale" not in result